@@ -1,17 +1,39 @@
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
-# Create the root agent
-question_answering_agent = Agent(
-    name="question_answering_agent",
-    model="gemini-2.0-flash",
-    description="Question answering agent",
-    instruction="""
+from .preference_index import relevant_preferences
+
+INSTRUCTION_TEMPLATE = """
     You are a helpful assistant that answers questions about the user's preferences.
 
     Here is some information about the user:
-    Name: 
+    Name:
     {user_name}
-    Preferences: 
+    Preferences:
     {user_preferences}
-    """,
+    """
+
+
+def build_instruction(context: ReadonlyContext) -> str:
+    """
+    Fill in the instruction with only the preferences relevant to this turn
+    """
+    query = ""
+    if context.user_content and context.user_content.parts:
+        query = " ".join(part.text or "" for part in context.user_content.parts)
+
+    return INSTRUCTION_TEMPLATE.format(
+        user_name=context.state.get("user_name", ""),
+        user_preferences=relevant_preferences(
+            str(context.state.get("user_preferences", "")), query
+        ),
+    )
+
+
+# Create the root agent
+question_answering_agent = Agent(
+    name="question_answering_agent",
+    model="gemini-2.0-flash",
+    description="Question answering agent",
+    instruction=build_instruction,
 )
@@ -0,0 +1,106 @@
+"""
+Pick the parts of a user's preferences that matter for the current question.
+
+Preferences are split into sentence chunks and indexed with BM25, so the
+agent instruction only carries the top-k chunks for each query instead of
+the whole profile. Indexes are cached per preferences text, so a profile is
+only indexed again after it changes.
+"""
+
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+DEFAULT_TOP_K = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are at be by do does for from has have i in is it its me my of on "
+    "or our that the their them they this to was we what which who with you your".split()
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        # Crude plural folding, so "shows" matches "show"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def split_preferences(preferences: str) -> list[str]:
+    """
+    Split a preferences blob into sentence-sized chunks
+    """
+    return [
+        chunk.strip() for chunk in _SENTENCE_END.split(preferences) if chunk.strip()
+    ]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a small list of text chunks.
+    """
+
+    def __init__(self, chunks: list[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._term_freqs = [Counter(_tokenize(chunk)) for chunk in chunks]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = sum(self._lengths) / len(chunks) if chunks else 0.0
+
+        doc_freqs = Counter(term for tf in self._term_freqs for term in tf)
+        n = len(chunks)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        terms = [term for term in set(_tokenize(query)) if term in self._idf]
+        scores = []
+        for tf, length in zip(self._term_freqs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def top_k(self, query: str, k: int) -> list[str]:
+        """
+        The k best-matching chunks, in their original order
+        """
+        scores = self.scores(query)
+        # Ties go to the earlier chunk; chunks that don't match at all are
+        # only used when nothing matches
+        best = sorted(range(len(self.chunks)), key=lambda i: (-scores[i], i))[:k]
+        if best and scores[best[0]] > 0:
+            best = [i for i in best if scores[i] > 0]
+        return [self.chunks[i] for i in sorted(best)]
+
+
+@lru_cache(maxsize=128)
+def _index_for(preferences: str) -> BM25Index:
+    return BM25Index(split_preferences(preferences))
+
+
+def relevant_preferences(preferences: str, query: str, k: int = DEFAULT_TOP_K) -> str:
+    """
+    The preference chunks most relevant to query, one per line.
+
+    Profiles with at most k chunks are returned whole.
+    """
+    index = _index_for(preferences)
+    if len(index.chunks) <= k:
+        return "\n".join(index.chunks)
+    return "\n".join(index.top_k(query, k))
@@ -0,0 +1,414 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.database_session_service import (
+    Base,
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+    _extract_state_delta,
+    _merge_state,
+)
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from batching_session_service import (
+    PendingKey,
+    ends_turn,
+    merged_state_deltas,
+    to_storage_event,
+)
+from optimistic_state import (
+    MAX_WRITE_ATTEMPTS,
+    StateConflictError,
+    StateJournal,
+    conditional_state_update,
+)
+from session_indexes import (
+    LATEST_SESSION_INDEX,
+    SESSION_EVENTS_INDEX,
+    session_events,
+)
+
+
+def from_storage_event(storage_event: StorageEvent) -> Event:
+    return Event(
+        id=storage_event.id,
+        author=storage_event.author,
+        branch=storage_event.branch,
+        invocation_id=storage_event.invocation_id,
+        content=_session_util.decode_content(storage_event.content),
+        actions=storage_event.actions,
+        timestamp=storage_event.timestamp.timestamp(),
+        long_running_tool_ids=storage_event.long_running_tool_ids,
+        grounding_metadata=storage_event.grounding_metadata,
+        partial=storage_event.partial,
+        turn_complete=storage_event.turn_complete,
+        error_code=storage_event.error_code,
+        error_message=storage_event.error_message,
+        interrupted=storage_event.interrupted,
+    )
+
+
+def _session_with_states(app_name: str, user_id: str, session_id: str):
+    # The session row plus its app and user state in a single query
+    return (
+        select(StorageSession, StorageAppState.state, StorageUserState.state)
+        .outerjoin(StorageAppState, StorageAppState.app_name == StorageSession.app_name)
+        .outerjoin(
+            StorageUserState,
+            (StorageUserState.app_name == StorageSession.app_name)
+            & (StorageUserState.user_id == StorageSession.user_id),
+        )
+        .where(
+            StorageSession.app_name == app_name,
+            StorageSession.user_id == user_id,
+            StorageSession.id == session_id,
+        )
+    )
+
+
+class AsyncSqliteSessionService(BaseSessionService):
+    """
+    SQLite session service on aiosqlite that never blocks the event loop.
+
+    DatabaseSessionService runs its queries on the event loop thread, so while
+    one session reads or writes the database every other conversation waits.
+    Here each pooled connection runs on its own aiosqlite thread and the
+    loop only awaits the result. The pool is bounded by pool_size, and
+    statements are reused from SQLAlchemy's compiled cache and sqlite3's
+    prepared statement cache. Reads run concurrently under WAL; write
+    transactions are queued on an asyncio lock, since SQLite allows one
+    writer at a time and its own busy handler would otherwise make them
+    sleep and retry. The lock covers only the statements of the write
+    itself: a turn reads and rebases its state outside it, and the
+    compare-and-set catches a writer that got in between.
+
+    It uses the same tables as DatabaseSessionService, so both can open the
+    same database file, and persists each turn in one transaction like
+    BatchingSessionService, with the same compare-and-set of session state
+    for concurrent turns.
+    """
+
+    def __init__(
+        self,
+        db_url: str,
+        pool_size: int = 8,
+        max_pending: int = 64,
+        cached_statements: int = 256,
+    ):
+        url = make_url(db_url)
+        if url.get_backend_name() != "sqlite":
+            raise ValueError(
+                f"AsyncSqliteSessionService needs a SQLite URL, got '{db_url}'"
+            )
+
+        # Create the schema and switch to WAL with a short-lived sync engine,
+        # so the constructor stays synchronous like DatabaseSessionService's
+        sync_engine = create_engine(url.set(drivername="sqlite"))
+        Base.metadata.create_all(sync_engine)
+        LATEST_SESSION_INDEX.create(sync_engine, checkfirst=True)
+        SESSION_EVENTS_INDEX.create(sync_engine, checkfirst=True)
+        with sync_engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        sync_engine.dispose()
+
+        self.db_engine = create_async_engine(
+            url.set(drivername="sqlite+aiosqlite"),
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=0,
+            connect_args={"cached_statements": cached_statements},
+        )
+
+        @sqlalchemy_event.listens_for(self.db_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # In WAL mode NORMAL only fsyncs at checkpoints, not every commit
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        self.database_session_factory = async_sessionmaker(
+            self.db_engine, expire_on_commit=False
+        )
+        self.max_pending = max_pending
+        self._pending: dict[PendingKey, tuple[Session, list[Event], StateJournal]] = {}
+        self._write_lock = asyncio.Lock()
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        app_state_delta, user_state_delta, session_state = _extract_state_delta(state)
+
+        async with self.database_session_factory() as db:
+            async with self._write_lock:
+                # Sessions are created concurrently, so add missing state rows
+                # with ON CONFLICT instead of check-then-insert
+                await db.execute(
+                    sqlite_insert(StorageAppState)
+                    .values(app_name=app_name, state={})
+                    .on_conflict_do_nothing()
+                )
+                await db.execute(
+                    sqlite_insert(StorageUserState)
+                    .values(app_name=app_name, user_id=user_id, state={})
+                    .on_conflict_do_nothing()
+                )
+                storage_app_state = await db.get(StorageAppState, app_name)
+                storage_user_state = await db.get(StorageUserState, (app_name, user_id))
+
+                app_state = {**storage_app_state.state, **app_state_delta}
+                user_state = {**storage_user_state.state, **user_state_delta}
+                if app_state_delta:
+                    storage_app_state.state = app_state
+                if user_state_delta:
+                    storage_user_state.state = user_state
+
+                storage_session = StorageSession(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    state=session_state,
+                )
+                db.add(storage_session)
+                await db.commit()
+            await db.refresh(storage_session)
+
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=storage_session.id,
+            state=_merge_state(app_state, user_state, session_state),
+            last_update_time=storage_session.update_time.timestamp(),
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        for key in self._session_keys(app_name, user_id, session_id):
+            await self._flush(key)
+
+        # Filter on the full key so the events index is used
+        query = (
+            select(StorageEvent)
+            .where(session_events(app_name, user_id, session_id))
+            .order_by(StorageEvent.timestamp.desc())
+        )
+        if config and config.after_timestamp:
+            after = datetime.fromtimestamp(config.after_timestamp)
+            query = query.where(StorageEvent.timestamp >= after)
+        if config and config.num_recent_events:
+            query = query.limit(config.num_recent_events)
+
+        async with self.database_session_factory() as db:
+            row = (
+                await db.execute(_session_with_states(app_name, user_id, session_id))
+            ).first()
+            if row is None:
+                return None
+            storage_events = (await db.scalars(query)).all()
+
+        storage_session, app_state, user_state = row
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=_merge_state(
+                app_state or {}, user_state or {}, storage_session.state
+            ),
+            last_update_time=storage_session.update_time.timestamp(),
+        )
+        session.events = [from_storage_event(e) for e in reversed(storage_events)]
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        query = select(StorageSession.id, StorageSession.update_time).where(
+            StorageSession.app_name == app_name, StorageSession.user_id == user_id
+        )
+        async with self.database_session_factory() as db:
+            rows = (await db.execute(query)).all()
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=row.id,
+                    state={},
+                    last_update_time=row.update_time.timestamp(),
+                )
+                for row in rows
+            ]
+        )
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        for key in self._session_keys(app_name, user_id, session_id):
+            del self._pending[key]
+        async with self.database_session_factory() as db, self._write_lock:
+            await db.execute(
+                delete(StorageSession).where(
+                    StorageSession.app_name == app_name,
+                    StorageSession.user_id == user_id,
+                    StorageSession.id == session_id,
+                )
+            )
+            await db.commit()
+
+    def _session_keys(self, app_name: str, user_id: str, session_id: str):
+        return [
+            key for key in self._pending if key[:3] == (app_name, user_id, session_id)
+        ]
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+
+        # Concurrent turns of one session have their own Session objects
+        key = (session.app_name, session.user_id, session.id, id(session))
+        _, pending, journal = self._pending.setdefault(
+            key, (session, [], StateJournal())
+        )
+        journal.record(session.state, event.actions and event.actions.state_delta)
+
+        # Update the in-memory session now, persist the turn when it ends
+        await super().append_event(session=session, event=event)
+        pending.append(event)
+
+        if ends_turn(event) or len(pending) >= self.max_pending:
+            await self._flush(key)
+        return event
+
+    async def _flush(self, key: PendingKey):
+        session, events, journal = self._pending.pop(key, (None, None, None))
+        if not events:
+            return
+
+        app_state_delta, user_state_delta, session_state_delta = merged_state_deltas(
+            events
+        )
+        row_key = key[:3]
+
+        async with self.database_session_factory() as db:
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                # Read and rebase outside the write lock, so other sessions'
+                # writes aren't held up by this one's
+                storage_session = await db.get(
+                    StorageSession, row_key, populate_existing=True
+                )
+                stored_state = storage_session.state
+                new_state = {
+                    **stored_state,
+                    **journal.rebase(stored_state, session_state_delta),
+                }
+                # Hand the connection back while waiting for the lock, so
+                # the lock holder can always get one from the pool
+                await db.rollback()
+                async with self._write_lock:
+                    update_time = await self._write_turn(
+                        db,
+                        session,
+                        conditional_state_update(*row_key, stored_state, new_state),
+                        app_state_delta,
+                        user_state_delta,
+                        events,
+                    )
+                if update_time is not None:
+                    break
+            else:
+                raise StateConflictError(
+                    f"Session {session.id} kept changing; gave up writing this "
+                    f"turn after {MAX_WRITE_ATTEMPTS} attempts"
+                )
+
+        session.state.update(new_state)
+        session.last_update_time = update_time.timestamp()
+
+    async def _write_turn(
+        self,
+        db: AsyncSession,
+        session: Session,
+        state_update,
+        app_state_delta: dict[str, Any],
+        user_state_delta: dict[str, Any],
+        events: list[Event],
+    ) -> Optional[datetime]:
+        """
+        Write one turn in a single transaction, returning the session's new
+        update time, or None if another writer changed its state first
+        """
+        try:
+            update_time = (
+                await db.execute(state_update.returning(StorageSession.update_time))
+            ).scalar_one_or_none()
+        except OperationalError:
+            update_time = None
+        if update_time is None:
+            await db.rollback()
+            return None
+
+        # App and user state are read and written under the lock, so turns
+        # in this process don't overwrite each other's changes
+        if app_state_delta:
+            storage_app_state = await db.get(
+                StorageAppState, session.app_name, populate_existing=True
+            )
+            storage_app_state.state = {**storage_app_state.state, **app_state_delta}
+        if user_state_delta:
+            storage_user_state = await db.get(
+                StorageUserState,
+                (session.app_name, session.user_id),
+                populate_existing=True,
+            )
+            storage_user_state.state = {
+                **storage_user_state.state,
+                **user_state_delta,
+            }
+
+        db.add_all(to_storage_event(session, event) for event in events)
+        await db.commit()
+        return update_time
+
+    async def flush_all(self):
+        """
+        Persist every buffered event, e.g. before shutting down
+        """
+        for key in list(self._pending):
+            await self._flush(key)
+
+    async def close(self):
+        """
+        Flush buffered events and release the connection pool
+        """
+        await self.flush_all()
+        await self.db_engine.dispose()
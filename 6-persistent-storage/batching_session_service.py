@@ -0,0 +1,243 @@
+from datetime import datetime
+from typing import Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, DatabaseSessionService, Session
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.database_session_service import (
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+    _extract_state_delta,
+)
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.exc import OperationalError
+
+from optimistic_state import (
+    MAX_WRITE_ATTEMPTS,
+    StateConflictError,
+    StateJournal,
+    conditional_state_update,
+)
+
+# (app_name, user_id, session_id, id of the in-memory Session)
+PendingKey = tuple[str, str, str, int]
+
+
+def merged_state_deltas(events: list[Event]) -> tuple[dict, dict, dict]:
+    """
+    App, user and session state deltas of a batch of events, merged in order
+    """
+    state_delta = {}
+    for event in events:
+        if event.actions and event.actions.state_delta:
+            state_delta.update(event.actions.state_delta)
+    return _extract_state_delta(state_delta)
+
+
+def to_storage_event(session: Session, event: Event) -> StorageEvent:
+    storage_event = StorageEvent(
+        id=event.id,
+        invocation_id=event.invocation_id,
+        author=event.author,
+        branch=event.branch,
+        actions=event.actions,
+        session_id=session.id,
+        app_name=session.app_name,
+        user_id=session.user_id,
+        timestamp=datetime.fromtimestamp(event.timestamp),
+        long_running_tool_ids=event.long_running_tool_ids,
+        grounding_metadata=event.grounding_metadata,
+        partial=event.partial,
+        turn_complete=event.turn_complete,
+        error_code=event.error_code,
+        error_message=event.error_message,
+        interrupted=event.interrupted,
+    )
+    if event.content:
+        storage_event.content = _session_util.encode_content(event.content)
+    return storage_event
+
+
+def ends_turn(event: Event) -> bool:
+    """
+    Whether an event is the agent's final response, after which a turn is flushed
+    """
+    return event.author != "user" and event.is_final_response()
+
+
+class BatchingSessionService(DatabaseSessionService):
+    """
+    DatabaseSessionService that writes each invocation in one transaction.
+
+    The stock service commits every event on its own, so one pizza order turn
+    (user message, tool calls, tool responses, final reply) costs several
+    commits and fsyncs. This service applies events to the in-memory session
+    right away and buffers them, then persists the whole batch together with
+    the merged state delta in a single transaction when the agent's final
+    response arrives. On SQLite it also switches the database to WAL mode.
+
+    Buffered events are flushed before the session is read again, and at most
+    max_pending events are held per session. If the process dies mid-turn the
+    unfinished turn is lost, which is the same outcome as a turn that failed.
+
+    Turns running concurrently on one session, in this process or another,
+    are batched apart and their state is written with optimistic_state's
+    compare-and-set, merging the order where both changed it.
+    """
+
+    def __init__(self, db_url: str, max_pending: int = 64):
+        super().__init__(db_url=db_url)
+        self.max_pending = max_pending
+        self._pending: dict[PendingKey, tuple[Session, list[Event], StateJournal]] = {}
+
+        if self.db_engine.dialect.name == "sqlite":
+            self._enable_wal()
+
+    def _enable_wal(self):
+        @sqlalchemy_event.listens_for(self.db_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode NORMAL only fsyncs at checkpoints, not every commit
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        # Drop connections opened while creating the schema so every pooled
+        # connection gets the pragmas
+        self.db_engine.dispose()
+
+    @staticmethod
+    def _key(session: Session) -> PendingKey:
+        # Each turn has its own Session object, so concurrent turns of one
+        # session keep separate batches
+        return (session.app_name, session.user_id, session.id, id(session))
+
+    def _session_keys(self, app_name: str, user_id: str, session_id: str):
+        return [
+            key for key in self._pending if key[:3] == (app_name, user_id, session_id)
+        ]
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+
+        key = self._key(session)
+        _, pending, journal = self._pending.setdefault(
+            key, (session, [], StateJournal())
+        )
+        journal.record(session.state, event.actions and event.actions.state_delta)
+
+        # Update the in-memory session now, persist later
+        await BaseSessionService.append_event(self, session=session, event=event)
+        pending.append(event)
+
+        if ends_turn(event) or len(pending) >= self.max_pending:
+            self._flush(key)
+        return event
+
+    def _flush(self, key: PendingKey):
+        session, events, journal = self._pending.pop(key, (None, None, None))
+        if not events:
+            return
+
+        # Merge all state deltas so each state row is written once
+        app_state_delta, user_state_delta, session_state_delta = merged_state_deltas(
+            events
+        )
+        row_key = (session.app_name, session.user_id, session.id)
+
+        with self.database_session_factory() as session_factory:
+            # Compare-and-set the session state, rebasing this turn's changes
+            # on the stored state whenever another writer got in first
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                storage_session = session_factory.get(
+                    StorageSession, row_key, populate_existing=True
+                )
+                stored_state = storage_session.state
+                new_state = {
+                    **stored_state,
+                    **journal.rebase(stored_state, session_state_delta),
+                }
+                try:
+                    result = session_factory.execute(
+                        conditional_state_update(*row_key, stored_state, new_state)
+                    )
+                except OperationalError:
+                    # SQLite refuses the write if another connection
+                    # committed since this transaction's read
+                    result = None
+                if result is not None and result.rowcount == 1:
+                    break
+                session_factory.rollback()
+            else:
+                raise StateConflictError(
+                    f"Session {session.id} kept changing; gave up writing this "
+                    f"turn after {MAX_WRITE_ATTEMPTS} attempts"
+                )
+
+            if app_state_delta:
+                storage_app_state = session_factory.get(
+                    StorageAppState, (session.app_name)
+                )
+                storage_app_state.state = {
+                    **storage_app_state.state,
+                    **app_state_delta,
+                }
+            if user_state_delta:
+                storage_user_state = session_factory.get(
+                    StorageUserState, (session.app_name, session.user_id)
+                )
+                storage_user_state.state = {
+                    **storage_user_state.state,
+                    **user_state_delta,
+                }
+
+            session_factory.add_all(
+                to_storage_event(session, event) for event in events
+            )
+
+            session_factory.commit()
+            session_factory.refresh(storage_session)
+            # Pick up what concurrent turns wrote, and the new versions
+            session.state.update(new_state)
+            session.last_update_time = storage_session.update_time.timestamp()
+
+    def flush_all(self):
+        """
+        Persist every buffered event, e.g. before shutting down
+        """
+        for key in list(self._pending):
+            self._flush(key)
+
+    async def close(self):
+        """
+        Flush buffered events and release the connection pool
+        """
+        self.flush_all()
+        self.db_engine.dispose()
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        for key in self._session_keys(app_name, user_id, session_id):
+            self._flush(key)
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        for key in self._session_keys(app_name, user_id, session_id):
+            del self._pending[key]
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
@@ -0,0 +1,110 @@
+"""
+Token budget of the compiled agent instruction, full and compact.
+
+Prints the estimated tokens of every instruction section in both modes for
+the current catalog, then for catalogs grown to --skus items to show how the
+catalog section scales, and times compiling the instruction and fetching it
+from the cache as the agent does on every model request.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.instructions --skus 100 1000 5000
+"""
+
+import argparse
+import timeit
+
+from pizza_order_agent.catalog import Catalog, get_catalog
+from pizza_order_agent.instructions import (
+    SECTIONS,
+    _cached_instruction,
+    compile_instruction,
+)
+
+
+def grown_catalog(catalog: Catalog, skus: int) -> Catalog:
+    """
+    The catalog with made-up pizzas and toppings appended up to skus items
+    """
+    pizzas = dict(catalog.pizza_menu)
+    toppings = dict(catalog.toppings)
+    i = 0
+    while len(pizzas) + len(toppings) < skus:
+        if i % 2:
+            toppings[f"topping_{i}"] = 1.5
+        else:
+            pizzas[f"house_special_{i}"] = {
+                "base_price": 15.99,
+                "description": "Chef's choice",
+            }
+        i += 1
+    return Catalog(catalog.version + skus, pizzas, catalog.size_multipliers, toppings)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Agent instruction token benchmark")
+    parser.add_argument(
+        "--skus",
+        type=int,
+        nargs="*",
+        default=[100, 1000],
+        help="Catalog sizes (pizzas plus toppings) to compile the instruction for",
+    )
+    parser.add_argument(
+        "--show", choices=("full", "compact"), help="Print the compiled instruction"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    catalog = get_catalog()
+    full = compile_instruction(catalog, compact=False)
+    compact = compile_instruction(catalog, compact=True)
+
+    if args.show:
+        print((compact if args.show == "compact" else full).text)
+
+    print(f"\n📝 Instruction tokens (estimated), catalog version {catalog.version}")
+    print(f"  {'section':<16}{'full':>8}{'compact':>10}")
+    for section in SECTIONS:
+        print(
+            f"  {section.name:<16}{full.section_tokens.get(section.name, 0):>8}"
+            f"{compact.section_tokens.get(section.name, 0):>10}"
+        )
+    print(f"  {'total':<16}{full.tokens:>8}{compact.tokens:>10}")
+    saved = full.tokens - compact.tokens
+    print(
+        f"  Compact saves {saved} tokens per model request "
+        f"({saved / full.tokens:.0%}), {saved * 1000:,} per 1,000 requests"
+    )
+
+    if args.skus:
+        print("\n📈 Total tokens by catalog size")
+        print(f"  {'items':<16}{'full':>8}{'compact':>10}")
+        for skus in args.skus:
+            grown = grown_catalog(catalog, skus)
+            print(
+                f"  {skus:<16}{compile_instruction(grown, compact=False).tokens:>8}"
+                f"{compile_instruction(grown, compact=True).tokens:>10}"
+            )
+
+    def compile_cold():
+        _cached_instruction.cache_clear()
+        compile_instruction(catalog, compact=False)
+
+    number = 1000
+    cold = min(timeit.repeat(compile_cold, number=number, repeat=3)) / number
+    compile_instruction(catalog, compact=False)
+    warm = min(
+        timeit.repeat(
+            lambda: compile_instruction(catalog), number=number * 100, repeat=3
+        )
+    ) / (number * 100)
+    print("\n⏱️  Compile time")
+    print(f"  {'compile':<16}{cold * 1e6:>8.1f} µs")
+    print(f"  {'cached':<16}{warm * 1e9:>8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""
+Open-loop load and soak test of the pizza order flow with an offline model.
+
+Synthetic customers arrive at a fixed average rate (Poisson arrivals) and
+each walks the order status machine one turn at a time:
+
+    START -> PIZZA_SELECTED -> SIZE_SELECTED -> DELIVERY_INFO_SET
+
+with an optional toppings turn between size and delivery. After every turn
+the session state is checked against the status it should have reached.
+Arrivals don't wait for earlier customers, so when the stack can't keep up
+latency and memory grow instead of the offered load quietly dropping.
+
+Process RSS is sampled with psutil while the test runs, which makes slow
+leaks visible over a long soak. Run from 6-persistent-storage:
+
+    python -m benchmarks.load_test --rate 50 --duration 60 --store sqlite-batched
+    python -m benchmarks.load_test --rate 20 --duration 3600 --delete-sessions --csv rss.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+
+import psutil
+from google.adk.runners import Runner
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+from benchmarks.metrics import Timings, percentile
+from benchmarks.order_flow import create_session_service
+from benchmarks.scripted_llm import ScriptedLlm
+from main import DEFAULT_ORDER_STATE
+from pizza_order_agent.agent import pizza_order_agent
+from pizza_order_agent.catalog import get_catalog
+from pizza_order_agent.order_state import load_order
+from utils import call_agent_async
+
+APP_NAME = "Pizza Agent Load Test"
+
+DELIVERY_MESSAGE = "Deliver to 123 Main Street, Springfield, phone 555-123-4567"
+STATUSES = ["START", "PIZZA_SELECTED", "SIZE_SELECTED", "DELIVERY_INFO_SET"]
+
+MB = 1024 * 1024
+
+
+def pizza_message(pizza_type: str) -> str:
+    return f"I'd like a {pizza_type.replace('_', ' ')} pizza"
+
+
+def size_message(size: str) -> str:
+    return f"Make it {size.replace('_', ' ')}"
+
+
+def toppings_message(topping: str) -> str:
+    return f"Add extra {topping.replace('_', ' ')}"
+
+
+def build_load_script() -> list[dict]:
+    """
+    ScriptedLlm turns for every pizza, size and topping a customer can pick
+    """
+    catalog = get_catalog()
+    script = [
+        {
+            "user": pizza_message(pizza_type),
+            "steps": [[("set_pizza_type", {"pizza_type": pizza_type})]],
+            "reply": "Great choice! What size would you like?",
+        }
+        for pizza_type in catalog.pizza_menu
+    ]
+    script += [
+        {
+            "user": size_message(size),
+            "steps": [[("set_pizza_size", {"size": size})]],
+            "reply": "Perfect! Any extra toppings?",
+        }
+        for size in catalog.size_multipliers
+    ]
+    script += [
+        {
+            "user": toppings_message(topping),
+            "steps": [[("add_toppings", {"toppings": [topping]})]],
+            "reply": "Added! Where should we deliver?",
+        }
+        for topping in catalog.toppings
+    ]
+    script.append(
+        {
+            "user": DELIVERY_MESSAGE,
+            "steps": [
+                [
+                    (
+                        "set_delivery_info",
+                        {
+                            "address": "123 Main Street, Springfield",
+                            "phone_number": "555-123-4567",
+                        },
+                    )
+                ]
+            ],
+            "reply": "Got your delivery details.",
+        }
+    )
+    return script
+
+
+def customer_journey(
+    rng: random.Random, toppings_probability: float
+) -> list[tuple[str, str, str]]:
+    """
+    (turn name, user message, status expected afterwards) for one customer
+    """
+    catalog = get_catalog()
+    pizza_type = rng.choice(list(catalog.pizza_menu))
+    size = rng.choice(list(catalog.size_multipliers))
+    journey = [
+        ("pizza", pizza_message(pizza_type), "PIZZA_SELECTED"),
+        ("size", size_message(size), "SIZE_SELECTED"),
+    ]
+    if rng.random() < toppings_probability:
+        # Toppings don't move the status forward
+        topping = rng.choice(catalog.topping_names)
+        journey.append(("toppings", toppings_message(topping), "SIZE_SELECTED"))
+    journey.append(("delivery", DELIVERY_MESSAGE, "DELIVERY_INFO_SET"))
+    return journey
+
+
+class RssSampler:
+    """
+    Samples process RSS and load test progress every interval seconds.
+    """
+
+    def __init__(self, stats: dict, interval: float = 1.0):
+        self.stats = stats
+        self.interval = interval
+        self.process = psutil.Process()
+        self.samples: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._start = 0.0
+
+    def sample(self):
+        self.samples.append(
+            {
+                "elapsed_s": time.perf_counter() - self._start,
+                "rss_mb": self.process.memory_info().rss / MB,
+                "in_flight": self.stats["in_flight"],
+                "completed": self.stats["completed"],
+                "turns": self.stats["turns"],
+            }
+        )
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self.sample()
+
+
+async def run_customer(
+    runner,
+    user_id: str,
+    journey: list[tuple[str, str, str]],
+    stats: dict,
+    turn_timings: Timings,
+    think_time_s: float,
+    delete_session: bool,
+    arrived_at: float,
+):
+    session_service = runner.session_service
+    session = await session_service.create_session(
+        app_name=APP_NAME, user_id=user_id, state=dict(DEFAULT_ORDER_STATE)
+    )
+    reached = "START"
+    for name, message, expected_status in journey:
+        start = time.perf_counter()
+        await call_agent_async(
+            user_input=message, runner=runner, user_id=user_id, session_id=session.id
+        )
+        turn_timings.add(name, time.perf_counter() - start)
+        stats["turns"] += 1
+
+        current = await session_service.get_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session.id,
+            config=GetSessionConfig(num_recent_events=1),
+        )
+        status = load_order(current.state).status.name
+        if status != expected_status:
+            stats["wrong_status"] += 1
+            break
+        reached = status
+        if think_time_s:
+            await asyncio.sleep(think_time_s)
+
+    stats["reached"][reached] += 1
+    if reached == STATUSES[-1]:
+        # Measured from the scheduled arrival, so time spent waiting for a
+        # busy event loop counts too
+        stats["order_latencies"].append(time.perf_counter() - arrived_at)
+    if delete_session:
+        await session_service.delete_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session.id
+        )
+
+
+async def run_load_test(
+    session_service,
+    rate: float = 50.0,
+    duration_s: float = 60.0,
+    customers: Optional[int] = None,
+    think_time_ms: float = 0.0,
+    model_latency_ms: float = 0.0,
+    toppings_probability: float = 0.5,
+    sample_interval_s: float = 1.0,
+    delete_sessions: bool = False,
+    seed: int = 0,
+) -> dict:
+    """
+    Offer `rate` new customers per second for duration_s seconds, or until
+    `customers` have arrived, then wait for every started order to finish
+    """
+    runner = Runner(
+        agent=pizza_order_agent.model_copy(
+            update={
+                "model": ScriptedLlm(
+                    script=build_load_script(), latency_ms=model_latency_ms
+                )
+            }
+        ),
+        app_name=APP_NAME,
+        session_service=session_service,
+    )
+    rng = random.Random(seed)
+    turn_timings = Timings()
+    stats = {
+        "arrived": 0,
+        "in_flight": 0,
+        "completed": 0,
+        "turns": 0,
+        "wrong_status": 0,
+        "errors": 0,
+        "first_error": None,
+        "reached": {status: 0 for status in STATUSES},
+        "order_latencies": [],
+    }
+
+    async def one_customer(i: int, journey, arrived_at: float):
+        stats["in_flight"] += 1
+        try:
+            await run_customer(
+                runner,
+                f"customer_{i}",
+                journey,
+                stats,
+                turn_timings,
+                think_time_ms / 1000,
+                delete_sessions,
+                arrived_at,
+            )
+        except Exception as e:
+            stats["errors"] += 1
+            if stats["first_error"] is None:
+                stats["first_error"] = f"{type(e).__name__}: {e}"
+        finally:
+            stats["in_flight"] -= 1
+            stats["completed"] += 1
+
+    sampler = RssSampler(stats, sample_interval_s)
+    sampler.start()
+    tasks = set()
+    start = time.perf_counter()
+    next_arrival = start
+    while customers is None or stats["arrived"] < customers:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start > duration_s:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+
+        journey = customer_journey(rng, toppings_probability)
+        task = asyncio.create_task(
+            one_customer(stats["arrived"], journey, next_arrival)
+        )
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        stats["arrived"] += 1
+
+    arrivals_s = time.perf_counter() - start
+    if tasks:
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await sampler.stop()
+
+    order_latencies = stats.pop("order_latencies")
+    return {
+        **stats,
+        "offered_rate": rate,
+        "arrival_rate": stats["arrived"] / arrivals_s if arrivals_s else 0.0,
+        "elapsed_s": elapsed,
+        "turns_per_s": stats["turns"] / elapsed if elapsed else 0.0,
+        "turn_latency": turn_timings.summary(),
+        "order_latency_ms": {
+            f"p{pct}": percentile(order_latencies, pct) * 1000 for pct in (50, 90, 99)
+        },
+        "rss_samples": sampler.samples,
+    }
+
+
+def rss_rows(samples: list[dict], max_rows: int = 20) -> list[dict]:
+    """
+    At most max_rows evenly spaced samples, always including the last one
+    """
+    if len(samples) <= max_rows:
+        return samples
+    step = (len(samples) - 1) / (max_rows - 1)
+    return [samples[round(i * step)] for i in range(max_rows)]
+
+
+def print_report(results: dict):
+    print(
+        f"\n📊 {results['arrived']} customers at {results['arrival_rate']:.1f}/s "
+        f"(offered {results['offered_rate']:.1f}/s), "
+        f"{results['turns']} turns in {results['elapsed_s']:.2f}s"
+    )
+    print(f"Throughput: {results['turns_per_s']:.1f} turns/s")
+    if results["arrival_rate"] < 0.9 * results["offered_rate"]:
+        print("⚠️  Arrivals fell behind the offered rate: the process is saturated")
+    print(
+        "Reached: "
+        + ", ".join(f"{status} {count}" for status, count in results["reached"].items())
+    )
+    if results["wrong_status"] or results["errors"]:
+        print(
+            f"⚠️  {results['wrong_status']} customers ended in the wrong status, "
+            f"{results['errors']} failed"
+        )
+        if results["first_error"]:
+            print(f"   First error: {results['first_error']}")
+
+    latency = results["order_latency_ms"]
+    print(
+        f"Order latency: p50 {latency['p50']:.2f}ms, "
+        f"p90 {latency['p90']:.2f}ms, p99 {latency['p99']:.2f}ms"
+    )
+    print("\n⏱️  Turn latency")
+    print(f"  {'turn':<12}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for name, stats in results["turn_latency"].items():
+        print(
+            f"  {name:<12}{stats['count']:>8}{stats['p50_ms']:>10.2f}"
+            f"{stats['p90_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+    samples = results["rss_samples"]
+    print("\n🧠 Memory over time")
+    print(f"  {'time s':>8}{'RSS MB':>10}{'in flight':>11}{'done':>8}{'turns':>9}")
+    for sample in rss_rows(samples):
+        print(
+            f"  {sample['elapsed_s']:>8.1f}{sample['rss_mb']:>10.1f}"
+            f"{sample['in_flight']:>11}{sample['completed']:>8}{sample['turns']:>9}"
+        )
+    peak = max(sample["rss_mb"] for sample in samples)
+    growth = samples[-1]["rss_mb"] - samples[0]["rss_mb"]
+    print(f"Peak RSS: {peak:.1f}MB, growth: {growth:+.1f}MB", end="")
+    if results["completed"]:
+        print(f" ({growth * 1024 / results['completed']:+.1f}KB per customer)")
+    else:
+        print()
+
+
+def write_rss_csv(path: str, samples: list[dict]):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(samples[0]))
+        writer.writeheader()
+        writer.writerows(samples)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pizza order load test")
+    parser.add_argument(
+        "--rate", type=float, default=50.0, help="New customers per second"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=60.0,
+        help="Seconds to keep customers arriving",
+    )
+    parser.add_argument(
+        "--customers", type=int, help="Stop arrivals after this many customers"
+    )
+    parser.add_argument(
+        "--store",
+        choices=["memory", "sqlite", "sqlite-batched", "sqlite-async"],
+        default="memory",
+    )
+    parser.add_argument(
+        "--think-time-ms",
+        type=float,
+        default=0.0,
+        help="Pause between a customer's turns",
+    )
+    parser.add_argument(
+        "--model-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated model latency added to every scripted model call",
+    )
+    parser.add_argument(
+        "--toppings-probability",
+        type=float,
+        default=0.5,
+        help="Share of customers who add a topping before delivery",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between RSS samples",
+    )
+    parser.add_argument(
+        "--delete-sessions",
+        action="store_true",
+        help="Delete each session once its order is done, for steady-state soaks",
+    )
+    parser.add_argument("--csv", help="Write the RSS samples to this CSV file")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_service = create_session_service(
+            args.store, os.path.join(tmp_dir, "load_test.db")
+        )
+        try:
+            results = await run_load_test(
+                session_service,
+                rate=args.rate,
+                duration_s=args.duration,
+                customers=args.customers,
+                think_time_ms=args.think_time_ms,
+                model_latency_ms=args.model_latency_ms,
+                toppings_probability=args.toppings_probability,
+                sample_interval_s=args.sample_interval,
+                delete_sessions=args.delete_sessions,
+                seed=args.seed,
+            )
+        finally:
+            if hasattr(session_service, "close"):
+                await session_service.close()
+    print_report(results)
+    if args.csv:
+        write_rss_csv(args.csv, results["rss_samples"])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
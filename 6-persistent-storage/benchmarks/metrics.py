@@ -0,0 +1,125 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+
+import math
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values, 0.0 for an empty list
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Timings:
+    """
+    Named collections of durations in seconds.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def add(self, name: str, seconds: float):
+        self.samples[name].append(seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Count, total and p50/p90/p99 in milliseconds for every name
+        """
+        return {
+            name: {
+                "count": len(values),
+                "total_ms": sum(values) * 1000,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p90_ms": percentile(values, 90) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+            for name, values in sorted(self.samples.items())
+        }
+
+
+class TimedSessionService(BaseSessionService):
+    """
+    Session service wrapper that records how long every call takes.
+    """
+
+    def __init__(self, inner: BaseSessionService, timings: Timings):
+        self.inner = inner
+        self.timings = timings
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        start = time.perf_counter()
+        try:
+            return await self.inner.create_session(
+                app_name=app_name, user_id=user_id, state=state, session_id=session_id
+            )
+        finally:
+            self.timings.add("create_session", time.perf_counter() - start)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        start = time.perf_counter()
+        try:
+            return await self.inner.get_session(
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                config=config,
+            )
+        finally:
+            self.timings.add("get_session", time.perf_counter() - start)
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        start = time.perf_counter()
+        try:
+            return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+        finally:
+            self.timings.add("list_sessions", time.perf_counter() - start)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            return await self.inner.delete_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+        finally:
+            self.timings.add("delete_session", time.perf_counter() - start)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        start = time.perf_counter()
+        try:
+            return await self.inner.append_event(session=session, event=event)
+        finally:
+            self.timings.add("append_event", time.perf_counter() - start)
@@ -0,0 +1,231 @@
+"""
+Benchmark of fuzzy catalog name matching on a replayed utterance corpus.
+
+Replays the names customers use for pizzas, sizes and toppings, as the model
+passes them to set_pizza_type, set_pizza_size and add_toppings, plus typos
+of them and items that aren't on the menu. Every call the old exact
+.lower() lookup rejects costs an error response and another model
+round-trip; the report counts those recovery turns with exact and fuzzy
+matching, checks the matcher never resolves to the wrong name, and times a
+lookup.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.name_matching --typos 3 --model-latency-ms 800
+"""
+
+import argparse
+import random
+import timeit
+
+from pizza_order_agent.catalog import get_catalog
+from pizza_order_agent.name_matching import (
+    match_pizza_type,
+    match_size,
+    match_topping,
+)
+
+# What customers call each catalog entry
+PIZZA_PHRASES = {
+    "margherita": ("margherita", "Margherita pizza", "margarita", "cheese pizza"),
+    "pepperoni": ("pepperoni", "Pepperoni", "pepperonis", "pepperoni pizza"),
+    "supreme": ("supreme", "the supreme", "Supreme Pizza"),
+    "hawaiian": ("hawaiian", "Hawaiian", "ham and pineapple", "hawaii"),
+    "meat_lovers": (
+        "meat_lovers",
+        "meat lovers",
+        "Meat Lover's",
+        "meat-lovers",
+        "meatlovers",
+    ),
+    "veggie": ("veggie", "vegetarian", "Veggie pizza", "veg"),
+}
+SIZE_PHRASES = {
+    "small": ("small", "Small", "sm", "personal"),
+    "medium": ("medium", "Medium", "med", "regular", "medium size"),
+    "large": ("large", "Large", "lg", "large size"),
+    "extra_large": ("extra_large", "extra large", "XL", "xl", "x-large", "Extra-Large"),
+}
+TOPPING_PHRASES = {
+    "pepperoni": ("pepperoni",),
+    "sausage": ("sausage", "sausages", "italian sausage"),
+    "mushrooms": ("mushrooms", "mushroom", "Mushrooms", "shrooms"),
+    "peppers": ("peppers", "pepper", "green peppers", "bell pepper"),
+    "onions": ("onions", "onion", "Onions"),
+    "olives": ("olives", "olive", "black olives"),
+    "extra_cheese": ("extra_cheese", "extra cheese", "cheese", "Extra Cheese"),
+    "bacon": ("bacon", "Bacon"),
+    "ham": ("ham", "Ham"),
+    "pineapple": ("pineapple", "pineapples"),
+}
+# Not on the menu, naming more than one item, or another word spelled with
+# a name's letters: these must still be rejected so the model asks the
+# customer
+OFF_MENU = {
+    "set_pizza_type": (
+        "calzone",
+        "bbq chicken",
+        "buffalo",
+        "white pizza",
+        "vegan",
+        "supreme veggie",
+        "hawaiian bbq",
+        "pepperoni supreme",
+    ),
+    "set_pizza_size": (
+        "huge",
+        "tiny",
+        "party",
+        "jumbo",
+        "medium-large",
+        "small medium",
+        "regal",
+        "lager",
+    ),
+    "add_toppings": (
+        "anchovies",
+        "jalapenos",
+        "spinach",
+        "chicken",
+        "ham and pineapple",
+        "bacon bits",
+        "olive oil",
+        "pepperoni and mushrooms",
+        "assuage",
+        "mah",
+        "voiles",
+    ),
+}
+
+CATALOG = get_catalog()
+TOOLS = {
+    "set_pizza_type": (PIZZA_PHRASES, match_pizza_type, CATALOG.pizza_menu),
+    "set_pizza_size": (SIZE_PHRASES, match_size, CATALOG.size_multipliers),
+    "add_toppings": (TOPPING_PHRASES, match_topping, CATALOG.toppings),
+}
+
+
+def make_typo(word: str, rng: random.Random) -> str:
+    """
+    One dropped, doubled or swapped letter
+    """
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        return word[:i] + word[i + 1 :]
+    if edit == "double":
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def build_corpus(typos: int, rng: random.Random) -> list[tuple[str, str, str | None]]:
+    """
+    (tool, name as passed, expected catalog name or None) per call
+    """
+    corpus = []
+    for tool, (phrases, _, _) in TOOLS.items():
+        for name, variants in phrases.items():
+            corpus.extend((tool, text, name) for text in variants)
+            # Typos of the catalog name as a customer would spell it
+            spoken = name.replace("_", " ")
+            if len(spoken) > 4:
+                corpus.extend(
+                    (tool, make_typo(spoken, rng), name) for _ in range(typos)
+                )
+        corpus.extend((tool, text, None) for text in OFF_MENU[tool])
+    return corpus
+
+
+def exact_match(catalog: dict, text: str) -> str | None:
+    # What the tools did before: a plain lowercase dictionary lookup
+    lowered = text.lower()
+    return lowered if lowered in catalog else None
+
+
+def replay(corpus, fuzzy: bool) -> dict:
+    recovery_turns = 0
+    wrong = 0
+    for tool, text, expected in corpus:
+        _, matcher, catalog = TOOLS[tool]
+        resolved = matcher(text) if fuzzy else exact_match(catalog, text)
+        if resolved is None and expected is not None:
+            # The error goes back to the model, which calls the tool again
+            recovery_turns += 1
+        elif resolved != expected:
+            wrong += 1
+    return {"recovery_turns": recovery_turns, "wrong": wrong}
+
+
+def ns_per_call(calls: list, number: int = 2000) -> float:
+    seconds = min(
+        timeit.repeat(
+            lambda: [matcher(text) for matcher, text in calls], number=number, repeat=3
+        )
+    )
+    return seconds / (number * len(calls)) * 1e9
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Catalog name matching benchmark")
+    parser.add_argument(
+        "--typos", type=int, default=3, help="Typos generated per catalog name"
+    )
+    parser.add_argument(
+        "--model-latency-ms",
+        type=float,
+        default=800.0,
+        help="Cost of one model round-trip, to estimate the time saved",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    corpus = build_corpus(args.typos, random.Random(args.seed))
+    on_menu = sum(1 for _, _, expected in corpus if expected is not None)
+
+    exact = replay(corpus, fuzzy=False)
+    fuzzy = replay(corpus, fuzzy=True)
+
+    print(f"\n🔤 {len(corpus)} replayed tool calls ({on_menu} on the menu)")
+    print(f"  {'':<22}{'exact':>10}{'fuzzy':>10}")
+    print(
+        f"  {'recovery turns':<22}{exact['recovery_turns']:>10}"
+        f"{fuzzy['recovery_turns']:>10}"
+    )
+    print(f"  {'wrong resolutions':<22}{exact['wrong']:>10}{fuzzy['wrong']:>10}")
+    saved = exact["recovery_turns"] - fuzzy["recovery_turns"]
+    print(
+        f"  Saved {saved} model round-trips "
+        f"(~{saved * args.model_latency_ms / 1000:.1f}s at {args.model_latency_ms:.0f}ms each)"
+    )
+
+    unresolved = [
+        (tool, text)
+        for tool, text, expected in corpus
+        if expected is not None and TOOLS[tool][1](text) is None
+    ]
+    if unresolved:
+        print(f"  Still unresolved: {unresolved}")
+
+    # Lookups by kind: canonical names, what only fuzzy matching resolves,
+    # and off-menu items that go through the whole trigram search
+    lookups = {"catalog names": [], "variants and typos": [], "off-menu items": []}
+    for tool, text, expected in corpus:
+        _, matcher, catalog = TOOLS[tool]
+        if expected is None:
+            kind = "off-menu items"
+        elif exact_match(catalog, text) is None:
+            kind = "variants and typos"
+        else:
+            kind = "catalog names"
+        lookups[kind].append((matcher, text))
+
+    print("\n⏱️  Lookup time")
+    for kind, calls in lookups.items():
+        print(f"  {kind:<22}{ns_per_call(calls) / 1000:>8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
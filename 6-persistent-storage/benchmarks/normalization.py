@@ -0,0 +1,126 @@
+"""
+Micro-benchmark of delivery info normalization.
+
+Compares the translate-table phone normalizer and the memoized address
+canonicalizer with the per-character filter / plain strip they replace.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.normalization --rows 200000
+"""
+
+import argparse
+import random
+import timeit
+
+from pizza_order_agent.normalization import (
+    normalize_address,
+    normalize_addresses,
+    normalize_phone,
+    normalize_phones,
+)
+
+PHONE_FORMATS = (
+    "{a}-{b}-{c}",
+    "({a}) {b}-{c}",
+    "+1 {a}.{b}.{c}",
+    "1{a}{b}{c}",
+    "{a} {b} {c} ext",
+)
+
+STREETS = ("Main Street", "Oak Ave", "Elm St", "Maple Road", "Pine Lane")
+CITIES = ("Springfield", "Shelbyville", "Capital City", "Ogdenville")
+
+
+def make_phones(count: int, rng: random.Random) -> list[str]:
+    return [
+        rng.choice(PHONE_FORMATS).format(
+            a=rng.randint(200, 999), b=rng.randint(200, 999), c=rng.randint(1000, 9999)
+        )
+        for _ in range(count)
+    ]
+
+
+def make_addresses(count: int, distinct: int, rng: random.Random) -> list[str]:
+    pool = [
+        f" {rng.randint(1, 9999)}  {rng.choice(STREETS)} ,{rng.choice(CITIES)} "
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def filter_phone(phone_number: str) -> str:
+    # What set_delivery_info used to do
+    return "".join(filter(str.isdigit, phone_number))
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def report(name: str, seconds: float, rows: int, baseline: float | None = None):
+    line = f"  {name:<32}{seconds * 1e9 / rows:>10.0f} ns/row"
+    if baseline:
+        line += f"{baseline / seconds:>8.1f}x"
+    print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Delivery info normalization benchmark"
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument(
+        "--distinct-addresses",
+        type=int,
+        default=2_000,
+        help="How many different addresses the rows are drawn from",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(42)
+    phones = make_phones(args.rows, rng)
+    addresses = make_addresses(args.rows, args.distinct_addresses, rng)
+
+    assert [filter_phone(p) for p in phones] == normalize_phones(phones)
+
+    print(f"\n📞 Phones ({args.rows} rows)")
+    baseline = best_of(lambda: [filter_phone(p) for p in phones])
+    report("filter(str.isdigit)", baseline, args.rows)
+    report(
+        "normalize_phone",
+        best_of(lambda: [normalize_phone(p) for p in phones]),
+        args.rows,
+        baseline,
+    )
+    report(
+        "normalize_phones (batch)",
+        best_of(lambda: normalize_phones(phones)),
+        args.rows,
+        baseline,
+    )
+
+    print(f"\n🏠 Addresses ({args.rows} rows, {args.distinct_addresses} distinct)")
+    baseline = best_of(lambda: [a.strip() for a in addresses])
+    report("str.strip (no canonicalization)", baseline, args.rows)
+    normalize_address.cache_clear()
+    report(
+        "normalize_address (cold)",
+        best_of(lambda: normalize_addresses(addresses), repeat=1),
+        args.rows,
+        baseline,
+    )
+    report(
+        "normalize_address (warm)",
+        best_of(lambda: normalize_addresses(addresses)),
+        args.rows,
+        baseline,
+    )
+    print(f"  {normalize_address.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
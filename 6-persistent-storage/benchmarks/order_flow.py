@@ -0,0 +1,182 @@
+"""
+End-to-end benchmark of the pizza order flow with an offline model.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.order_flow --sessions 200 --concurrency 50 --store sqlite
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+
+from async_session_service import AsyncSqliteSessionService
+from batching_session_service import BatchingSessionService
+from benchmarks.metrics import TimedSessionService, Timings, percentile
+from benchmarks.scripted_llm import ORDER_SCRIPT, ScriptedLlm
+from main import DEFAULT_ORDER_STATE
+from pizza_order_agent.agent import pizza_order_agent
+from utils import call_agent_async
+
+APP_NAME = "Pizza Agent Benchmark"
+
+
+def build_benchmark_agent(tool_timings: Timings, model_latency_ms: float = 0.0):
+    """
+    Copy of pizza_order_agent that runs on ScriptedLlm and times every tool
+    """
+    started = {}
+
+    def before_tool(tool, args, tool_context):
+        started[tool_context.function_call_id] = time.perf_counter()
+
+    def after_tool(tool, args, tool_context, tool_response):
+        start = started.pop(tool_context.function_call_id, None)
+        if start is not None:
+            tool_timings.add(tool.name, time.perf_counter() - start)
+
+    return pizza_order_agent.model_copy(
+        update={
+            "model": ScriptedLlm(latency_ms=model_latency_ms),
+            "before_tool_callback": before_tool,
+            "after_tool_callback": after_tool,
+        }
+    )
+
+
+def create_session_service(store: str, db_path: str):
+    if store == "sqlite":
+        return DatabaseSessionService(db_url=f"sqlite:///{db_path}")
+    if store == "sqlite-batched":
+        return BatchingSessionService(db_url=f"sqlite:///{db_path}")
+    if store == "sqlite-async":
+        return AsyncSqliteSessionService(db_url=f"sqlite:///{db_path}")
+    return InMemorySessionService()
+
+
+async def run_order_session(runner, session_service, user_id: str, turn_latencies):
+    session = await session_service.create_session(
+        app_name=APP_NAME, user_id=user_id, state=dict(DEFAULT_ORDER_STATE)
+    )
+    for turn in ORDER_SCRIPT:
+        start = time.perf_counter()
+        await call_agent_async(
+            user_input=turn["user"],
+            runner=runner,
+            user_id=user_id,
+            session_id=session.id,
+        )
+        turn_latencies.append(time.perf_counter() - start)
+
+
+async def run_benchmark(
+    session_service,
+    sessions: int = 100,
+    concurrency: int = 10,
+    model_latency_ms: float = 0.0,
+) -> dict:
+    """
+    Walk `sessions` scripted customers through the full order flow
+    """
+    tool_timings = Timings()
+    store_timings = Timings()
+    runner = Runner(
+        agent=build_benchmark_agent(tool_timings, model_latency_ms),
+        app_name=APP_NAME,
+        session_service=TimedSessionService(session_service, store_timings),
+    )
+
+    turn_latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one_customer(i: int):
+        async with slots:
+            await run_order_session(
+                runner, runner.session_service, f"customer_{i}", turn_latencies
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_customer(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "turns": len(turn_latencies),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(turn_latencies) / elapsed if elapsed else 0.0,
+        "turn_latency_ms": {
+            f"p{pct}": percentile(turn_latencies, pct) * 1000 for pct in (50, 90, 99)
+        },
+        "tools": tool_timings.summary(),
+        "session_store": store_timings.summary(),
+    }
+
+
+def print_timing_table(title: str, summary: dict):
+    print(f"\n{title}")
+    print(f"  {'name':<24}{'count':>8}{'total ms':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, stats in summary.items():
+        print(
+            f"  {name:<24}{stats['count']:>8}{stats['total_ms']:>12.2f}"
+            f"{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+        )
+
+
+def print_report(results: dict):
+    print(f"\n📊 {results['sessions']} sessions, {results['turns']} turns")
+    print(f"Elapsed: {results['elapsed_s']:.2f}s")
+    print(f"Throughput: {results['turns_per_s']:.1f} turns/s")
+    latency = results["turn_latency_ms"]
+    print(
+        f"Turn latency: p50 {latency['p50']:.2f}ms, "
+        f"p90 {latency['p90']:.2f}ms, p99 {latency['p99']:.2f}ms"
+    )
+    print_timing_table("🔧 Tool execution", results["tools"])
+    print_timing_table("💾 Session store", results["session_store"])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pizza order benchmark")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--store",
+        choices=["memory", "sqlite", "sqlite-batched", "sqlite-async"],
+        default="memory",
+    )
+    parser.add_argument(
+        "--model-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated model latency added to every scripted model call",
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_service = create_session_service(
+            args.store, os.path.join(tmp_dir, "benchmark.db")
+        )
+        try:
+            results = await run_benchmark(
+                session_service,
+                sessions=args.sessions,
+                concurrency=args.concurrency,
+                model_latency_ms=args.model_latency_ms,
+            )
+        finally:
+            # aiosqlite's worker threads keep the interpreter alive until closed
+            if hasattr(session_service, "close"):
+                await session_service.close()
+    print_report(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
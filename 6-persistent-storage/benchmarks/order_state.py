@@ -0,0 +1,168 @@
+"""
+Benchmark of the compact OrderState against the old per-key state dict.
+
+Measures what each representation costs per session: memory held in the
+session state, JSON size in the session database, and the time to encode
+and decode it as the session store does on every write and load.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.order_state --sessions 100000
+"""
+
+import argparse
+import json
+import random
+import timeit
+import tracemalloc
+
+from benchmarks.normalization import make_phones
+from pizza_order_agent.catalog import get_catalog
+from pizza_order_agent.order_state import ORDER_KEY, load_order
+from pizza_order_agent.order_totals import update_order_totals
+from pizza_order_agent.pricing import get_pricing_engine, tax_cents, to_dollars
+from pizza_order_agent.toppings import encode_toppings
+
+STREETS = ("Main Street", "Oak Ave", "Elm St", "Maple Road", "Pine Lane")
+
+
+def make_legacy_states(count: int, rng: random.Random) -> list[dict]:
+    """
+    Filled-in orders in the one-key-per-field layout the tools used to write
+    """
+    catalog = get_catalog()
+    engine = get_pricing_engine(catalog)
+    phones = make_phones(count, rng)
+    states = []
+    for phone in phones:
+        pizza_type = rng.choice(list(catalog.pizza_menu))
+        size = rng.choice(list(catalog.size_multipliers))
+        toppings = rng.sample(catalog.topping_names, rng.randint(0, 3))
+        quantity = rng.randint(1, 4)
+        quote = engine.quote(pizza_type, size, toppings, quantity)
+        states.append(
+            {
+                "status": "DELIVERY_INFO_SET",
+                "pizza_type": pizza_type,
+                "size": size,
+                "toppings_mask": encode_toppings(toppings),
+                "quantity": quantity,
+                "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, Springfield",
+                "phone_number": "".join(filter(str.isdigit, phone)),
+                "pizza_cents": quote.pizza_cents,
+                "toppings_cents": quote.toppings_cents,
+                "subtotal": quote.subtotal_cents / 100,
+                "tax": quote.tax_cents / 100,
+                "total_price": quote.total_cents / 100,
+            }
+        )
+    return states
+
+
+def retained_bytes(build) -> int:
+    """
+    Bytes still allocated by the objects build() returns
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del objects
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def report(name: str, legacy: float, compact: float, unit: str, scale: float = 1.0):
+    print(
+        f"  {name:<28}{legacy * scale:>12.0f}{compact * scale:>12.0f} {unit:<10}"
+        f"{legacy / compact:>6.1f}x"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OrderState representation benchmark")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(42)
+    legacy_states = make_legacy_states(args.sessions, rng)
+    compact_states = [
+        {ORDER_KEY: load_order(state).to_compact()} for state in legacy_states
+    ]
+    for legacy, compact in zip(legacy_states, compact_states):
+        assert load_order(legacy) == load_order(compact)
+
+    legacy_json = [json.dumps(state) for state in legacy_states]
+    compact_json = [json.dumps(state) for state in compact_states]
+    n = args.sessions
+
+    print(f"\n🧾 Order state ({n} sessions)")
+    print(f"  {'':<28}{'per-key':>12}{'compact':>12}")
+
+    # Session stores keep their own copy of every state, decoded from JSON
+    report(
+        "memory per session",
+        retained_bytes(lambda: [json.loads(s) for s in legacy_json]) / n,
+        retained_bytes(lambda: [json.loads(s) for s in compact_json]) / n,
+        "bytes",
+    )
+    report(
+        "JSON per session",
+        sum(map(len, legacy_json)) / n,
+        sum(map(len, compact_json)) / n,
+        "bytes",
+    )
+    report(
+        "json.dumps",
+        best_of(lambda: [json.dumps(state) for state in legacy_states]) / n,
+        best_of(lambda: [json.dumps(state) for state in compact_states]) / n,
+        "ns/session",
+        1e9,
+    )
+    report(
+        "json.loads",
+        best_of(lambda: [json.loads(s) for s in legacy_json]) / n,
+        best_of(lambda: [json.loads(s) for s in compact_json]) / n,
+        "ns/session",
+        1e9,
+    )
+
+    # What a tool does on every call: read the order, change it, store it
+    def set_quantity_legacy(state):
+        # The per-key update_order_totals path
+        state["quantity"] = 2
+        subtotal = (state["pizza_cents"] + state["toppings_cents"]) * state["quantity"]
+        tax = tax_cents(subtotal)
+        totals = {
+            "subtotal": to_dollars(subtotal),
+            "tax": to_dollars(tax),
+            "total_price": to_dollars(subtotal + tax),
+        }
+        for key, value in totals.items():
+            if state.get(key) != value:
+                state[key] = value
+
+    def set_quantity_compact(state):
+        order = load_order(state)
+        order.quantity = 2
+        update_order_totals(order)
+        order.save(state)
+
+    report(
+        "load, update, save",
+        best_of(lambda: [set_quantity_legacy(dict(s)) for s in legacy_states]) / n,
+        best_of(lambda: [set_quantity_compact(dict(s)) for s in compact_states]) / n,
+        "ns/session",
+        1e9,
+    )
+
+
+if __name__ == "__main__":
+    main()
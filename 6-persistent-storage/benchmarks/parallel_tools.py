@@ -0,0 +1,153 @@
+"""
+Benchmark of a multi-intent turn with sequential and parallel tool calls.
+
+One customer message makes the model call five order tools at once. The
+tools are made async and slowed down by --tool-latency-ms of awaited sleep,
+standing in for a database or API call, and the turn is run with ADK's
+sequential tool loop and with ParallelToolAgent. Both must leave the same
+order behind. Use --tool-latency-ms 0 to time the order tools as they are.
+
+Run from 6-persistent-storage:
+
+    python -m benchmarks.parallel_tools --turns 50 --tool-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import functools
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from benchmarks.metrics import percentile
+from benchmarks.scripted_llm import ScriptedLlm
+from main import DEFAULT_ORDER_STATE
+from pizza_order_agent.agent import pizza_order_agent
+from pizza_order_agent.order_state import load_order
+from utils import call_agent_async
+
+APP_NAME = "Pizza Agent Parallel Tools Benchmark"
+
+MULTI_INTENT_MESSAGE = (
+    "Two large pepperonis with mushrooms and olives, deliver to "
+    "123 Main Street, Springfield, phone 555-123-4567"
+)
+
+MULTI_INTENT_SCRIPT = [
+    {
+        "user": MULTI_INTENT_MESSAGE,
+        "steps": [
+            [
+                ("set_pizza_type", {"pizza_type": "pepperoni"}),
+                ("set_pizza_size", {"size": "large"}),
+                ("add_toppings", {"toppings": ["mushrooms", "olives"]}),
+                ("set_quantity", {"quantity": 2}),
+                (
+                    "set_delivery_info",
+                    {
+                        "address": "123 Main Street, Springfield",
+                        "phone_number": "555-123-4567",
+                    },
+                ),
+            ]
+        ],
+        "reply": "Two large pepperonis with mushrooms and olives are on the way!",
+    }
+]
+
+
+def with_latency(func, latency_s: float):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        await asyncio.sleep(latency_s)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def build_agent(parallel: bool, tool_latency_ms: float):
+    tools = pizza_order_agent.tools
+    if tool_latency_ms:
+        tools = [with_latency(tool, tool_latency_ms / 1000) for tool in tools]
+    return pizza_order_agent.model_copy(
+        update={
+            "model": ScriptedLlm(script=MULTI_INTENT_SCRIPT),
+            "tools": tools,
+            "parallel_tools": parallel,
+        }
+    )
+
+
+async def run_turns(parallel: bool, turns: int, tool_latency_ms: float) -> dict:
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=build_agent(parallel, tool_latency_ms),
+        app_name=APP_NAME,
+        session_service=session_service,
+    )
+
+    latencies = []
+    orders = []
+    for i in range(turns):
+        session = await session_service.create_session(
+            app_name=APP_NAME, user_id=f"customer_{i}", state=dict(DEFAULT_ORDER_STATE)
+        )
+        start = time.perf_counter()
+        await call_agent_async(
+            user_input=MULTI_INTENT_MESSAGE,
+            runner=runner,
+            user_id=session.user_id,
+            session_id=session.id,
+        )
+        latencies.append(time.perf_counter() - start)
+
+        stored = await session_service.get_session(
+            app_name=APP_NAME, user_id=session.user_id, session_id=session.id
+        )
+        orders.append(load_order(stored.state))
+
+    return {
+        "latency_ms": {
+            f"p{pct}": percentile(latencies, pct) * 1000 for pct in (50, 90, 99)
+        },
+        "orders": orders,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parallel tool execution benchmark")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument(
+        "--tool-latency-ms",
+        type=float,
+        default=20.0,
+        help="Awaited time added to every tool call",
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    sequential = await run_turns(False, args.turns, args.tool_latency_ms)
+    parallel = await run_turns(True, args.turns, args.tool_latency_ms)
+
+    print(
+        f"\n🧵 {args.turns} five-tool turns, {args.tool_latency_ms:.0f}ms per tool call"
+    )
+    for name, results in (("sequential", sequential), ("parallel", parallel)):
+        latency = results["latency_ms"]
+        print(
+            f"  {name:<12}p50 {latency['p50']:>8.2f}ms  "
+            f"p90 {latency['p90']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms"
+        )
+    speedup = sequential["latency_ms"]["p50"] / parallel["latency_ms"]["p50"]
+    print(f"  Speedup at p50: {speedup:.1f}x")
+
+    same = sequential["orders"] == parallel["orders"]
+    print(f"  Same orders as sequential: {'✅' if same else '❌'}")
+    print(f"  Final order: {parallel['orders'][0]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Deterministic offline stand-in for the Gemini model.
+
+ScriptedLlm replays fixed tool-call sequences so the whole agent stack
+(runner, tools, session service) can be measured without network access.
+"""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# One scripted conversation turn: the user message, the tool-call steps the
+# model makes (each step is a list of parallel calls) and the final reply.
+ORDER_SCRIPT = [
+    {
+        "user": "Show me the menu please",
+        "steps": [[("display_menu", {})]],
+        "reply": "Here is our menu! What would you like?",
+    },
+    {
+        "user": "I'd like a large supreme with bacon and ham",
+        "steps": [
+            [
+                ("set_pizza_type", {"pizza_type": "supreme"}),
+                ("set_pizza_size", {"size": "large"}),
+            ],
+            [("add_toppings", {"toppings": ["bacon", "ham"]})],
+        ],
+        "reply": "A large supreme with bacon and ham, great choice!",
+    },
+    {
+        "user": "Make it two of them",
+        "steps": [[("set_quantity", {"quantity": 2})]],
+        "reply": "Two pizzas it is.",
+    },
+    {
+        "user": "Deliver to 123 Main Street, Springfield, phone 555-123-4567",
+        "steps": [
+            [
+                (
+                    "set_delivery_info",
+                    {
+                        "address": "123 Main Street, Springfield",
+                        "phone_number": "555-123-4567",
+                    },
+                )
+            ]
+        ],
+        "reply": "Got your delivery details.",
+    },
+    {
+        "user": "What's my total?",
+        "steps": [[("calculate_total_price", {})]],
+        "reply": "Here is your total.",
+    },
+    {
+        "user": "Show me my order",
+        "steps": [[("view_current_order", {})]],
+        "reply": "Here is your order summary.",
+    },
+]
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Replays ORDER_SCRIPT-style scripts keyed on the latest user message.
+
+    The model keeps no per-session state: which step to replay is derived
+    from the number of model tool calls after the latest user message, so a
+    single instance can serve any number of concurrent sessions.
+    """
+
+    model: str = "scripted-llm"
+    script: list[dict] = ORDER_SCRIPT
+    latency_ms: float = 0.0
+
+    def _find_turn(self, llm_request: LlmRequest) -> tuple[dict | None, int]:
+        steps_taken = 0
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            if content.role == "user" and any(part.text for part in parts):
+                user_text = next(part.text for part in parts if part.text)
+                for turn in self.script:
+                    if turn["user"] == user_text:
+                        return turn, steps_taken
+                return None, steps_taken
+            if content.role == "model" and any(part.function_call for part in parts):
+                steps_taken += 1
+        return None, steps_taken
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        turn, steps_taken = self._find_turn(llm_request)
+        if turn is None:
+            parts = [types.Part(text="Sorry, I can only follow my script.")]
+        elif steps_taken < len(turn["steps"]):
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=name, args=args))
+                for name, args in turn["steps"][steps_taken]
+            ]
+        else:
+            parts = [types.Part(text=turn["reply"])]
+
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
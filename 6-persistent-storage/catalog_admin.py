@@ -0,0 +1,81 @@
+"""
+Publish and inspect the pizza catalog database.
+
+Running agents with PIZZA_CATALOG_DB pointing at the database pick up a
+published catalog within PIZZA_CATALOG_RELOAD_SECONDS, without a restart.
+A catalog is a JSON file with version, pizzas, sizes and toppings keys, in
+the shape `export` writes. Its version must be higher than the published
+one, and existing pizza types, sizes and toppings must stay in their order
+(new ones are appended), because their positions are stored in sessions.
+Until something is published, the built-in menu is the published catalog.
+
+Run from 6-persistent-storage:
+
+    python catalog_admin.py export > catalog.json
+    python catalog_admin.py publish catalog.json
+    python catalog_admin.py show
+"""
+
+import argparse
+import json
+import sys
+
+from pizza_order_agent.catalog import (
+    CATALOG_DB,
+    BuiltinCatalogSource,
+    SqliteCatalogSource,
+    load_catalog_file,
+)
+
+DEFAULT_CATALOG_DB = "./pizza_catalog.db"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage the pizza catalog database")
+    parser.add_argument(
+        "--db",
+        default=CATALOG_DB or DEFAULT_CATALOG_DB,
+        help="Catalog database (default: $PIZZA_CATALOG_DB or ./pizza_catalog.db)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show", help="Print the published version and item counts")
+    export = commands.add_parser(
+        "export", help="Print the published catalog (or the built-in one) as JSON"
+    )
+    export.add_argument(
+        "--builtin", action="store_true", help="Export the built-in menu.py catalog"
+    )
+    publish = commands.add_parser("publish", help="Publish a catalog JSON file")
+    publish.add_argument("path", help="Catalog JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    source = SqliteCatalogSource(args.db)
+
+    if args.command == "publish":
+        catalog = load_catalog_file(args.path)
+        try:
+            source.publish(catalog)
+        except ValueError as error:
+            sys.exit(f"❌ Not published: {error}")
+        print(f"✅ Published {catalog} to {args.db}")
+        return
+
+    published = source.version()
+    if args.command == "show":
+        if not published:
+            print(f"📭 No catalog published to {args.db} yet")
+        else:
+            print(f"📋 {source.load()} in {args.db}")
+        return
+
+    builtin = args.builtin or not published
+    catalog = (BuiltinCatalogSource() if builtin else source).load()
+    json.dump(catalog.to_dict(), sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
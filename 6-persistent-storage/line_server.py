@@ -0,0 +1,98 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import sys
+from collections.abc import Awaitable, Callable
+
+
+class JsonLineServer(ABC):
+    """
+    JSONL request/response transport shared by the pizza order servers.
+
+    Subclasses implement handle(), which turns one request dict into one
+    response dict. Each request line is handled in its own task.
+    """
+
+    @abstractmethod
+    async def handle(self, request: dict) -> dict:
+        """
+        The response to one request
+        """
+
+    async def _handle_line(self, line: bytes, send: Callable[[dict], Awaitable[None]]):
+        request = {}
+        try:
+            parsed = json.loads(line)
+            if not isinstance(parsed, dict):
+                raise ValueError(
+                    f"Request must be a JSON object, got {type(parsed).__name__}"
+                )
+            request = parsed
+            result = await self.handle(request)
+        except Exception as e:
+            result = {
+                "request_id": request.get("request_id"),
+                "user_id": request.get("user_id"),
+                "session_id": request.get("session_id"),
+                "error": str(e),
+            }
+        await send(result)
+
+    async def serve_lines(
+        self,
+        readline: Callable[[], Awaitable[bytes]],
+        send: Callable[[dict], Awaitable[None]],
+    ):
+        """
+        Handle a JSONL request stream until EOF, sending one response per line.
+
+        Responses for different sessions may arrive out of order; use
+        request_id to match them up.
+        """
+        tasks = set()
+        while line := await readline():
+            if not line.strip():
+                continue
+            task = asyncio.create_task(self._handle_line(line, send))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_stdio(self):
+        """
+        Read JSONL requests from stdin and write JSONL responses to stdout
+        """
+
+        async def readline() -> bytes:
+            # stdin may be a regular file, so read it on a worker thread
+            return await asyncio.to_thread(sys.stdin.buffer.readline)
+
+        async def send(result: dict):
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+
+        await self.serve_lines(readline, send)
+
+    async def serve_unix_socket(self, path: str):
+        """
+        Accept JSONL request streams on a local unix socket until cancelled
+        """
+
+        async def on_connection(reader, writer):
+            write_lock = asyncio.Lock()
+
+            async def send(result: dict):
+                async with write_lock:
+                    writer.write((json.dumps(result) + "\n").encode())
+                    await writer.drain()
+
+            try:
+                await self.serve_lines(reader.readline, send)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(on_connection, path=path)
+        print(f"🍕 Serving pizza orders on {path}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
@@ -1,67 +1,152 @@
+import argparse
 import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
-
-from pizza_order_agent.agent import pizza_order_agent
-from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
-from utils import (
-    call_agent_async,
-    format_order_state_for_display,
-    get_order_status_message,
-)
 import warnings
 
+# ADK, the pizza agent and the session services are imported where they are
+# first needed, so `--help`, importing DEFAULT_ORDER_STATE and short-lived
+# workers don't pay for them up front
+
 # Ignore all warnings
 warnings.filterwarnings("ignore")
 
 load_dotenv()
 
+# After load_dotenv, since the catalog reads its settings from the environment.
+# Only the order state module is loaded, not the agent
+from pizza_order_agent.order_state import OrderState  # noqa: E402
+
+DB_URL = "sqlite:///./pizza_order_agent_data.db"
+
+# Default pizza order state: an empty OrderState in its compact form
+DEFAULT_ORDER_STATE = {"order": OrderState().to_compact()}
+
+
+class StartupTimer:
+    """
+    Measures how long each startup phase takes
+    """
+
+    def __init__(self):
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        lines = ["⏱️  Startup timing:"]
+        for name, seconds in self.phases:
+            lines.append(f"   {name:<22}{seconds * 1000:>9.1f} ms")
+        total = sum(seconds for _, seconds in self.phases)
+        lines.append(f"   {'total':<22}{total * 1000:>9.1f} ms")
+        return "\n".join(lines)
+
 
-# Create database session service
-db_url = "sqlite:///./pizza_order_agent_data.db"
-db_session_service = DatabaseSessionService(db_url=db_url)
+def load_agent():
+    """
+    Import the pizza agent, which pulls in ADK and the model client
+    """
+    from pizza_order_agent.agent import pizza_order_agent
 
-# Default pizza order state structure
-DEFAULT_ORDER_STATE = {
-    "status": "START",
-    "pizza_type": None,
-    "size": None,
-    "toppings": [],
-    "quantity": 1,
-    "address": None,
-    "phone_number": None,
-    "total_price": 0.0,
-}
+    return pizza_order_agent
+
+
+def create_session_service(async_db: bool = False):
+    """
+    Create the single session service (and connection pool) for this process
+    """
+    # Both persist each turn in a single transaction instead of one per event
+    if async_db:
+        from async_session_service import AsyncSqliteSessionService
+
+        # Database work runs off the event loop, so sessions don't stall each other
+        return AsyncSqliteSessionService(db_url=DB_URL)
+
+    from batching_session_service import BatchingSessionService
+
+    return BatchingSessionService(db_url=DB_URL)
 
 
 class CLIRunner:
-    def __init__(self, app_name: str, user_id: str, session_service):
+    def __init__(
+        self,
+        app_name: str,
+        user_id: str,
+        session_service,
+        stream: bool = False,
+        agent=None,
+        response_cache=None,
+    ):
         self.app_name = app_name
         self.user_id = user_id
         self.session_service = session_service
+        self.stream = stream
+        self.response_cache = response_cache
         self.session_id = None
-        self.runner = Runner(
-            agent=pizza_order_agent,
-            app_name=app_name,
-            session_service=session_service,
-        )
+        self._agent = agent
+        self._runner = None
 
-    async def start(self):
-        # Check if there are any existing session available for the user
-        session_state = await self.session_service.list_sessions(
-            app_name=self.app_name,
+    @property
+    def runner(self):
+        # Built on first use, so the prompt shows up before the agent and
+        # model client are imported
+        if self._runner is None:
+            from google.adk.runners import Runner
+
+            self._runner = Runner(
+                agent=self._agent or load_agent(),
+                app_name=self.app_name,
+                session_service=self.session_service,
+            )
+        return self._runner
+
+    async def _stream_response(self, user_input: str):
+        from utils import stream_agent_async
+
+        # Render text as soon as it arrives instead of waiting for the full turn
+        print("\n🤖 Pizza Assistant: ", end="", flush=True)
+        got_text = False
+        async for chunk in stream_agent_async(
+            user_input=user_input,
+            runner=self.runner,
             user_id=self.user_id,
+            session_id=self.session_id,
+        ):
+            if chunk["type"] == "text":
+                got_text = True
+                print(chunk["text"], end="", flush=True)
+            elif chunk["type"] == "tool_call":
+                print(f"\n   🔧 {chunk['name']}...", flush=True)
+            elif chunk["type"] == "final":
+                print()
+        if not got_text:
+            print("❌ Sorry, I didn't understand that. Could you please try again?")
+
+    async def resume_or_create_session(self):
+        from session_lookup import find_latest_session
+        from utils import format_order_state_for_display, get_order_status_message
+
+        # Resume the user's most recent session if there is one
+        latest_session = await find_latest_session(
+            self.session_service, self.app_name, self.user_id
         )
-        # if there is an existing session use it else create a new one
-        if session_state and len(session_state.sessions) > 0:
-            self.session_id = session_state.sessions[0].id
+        if latest_session:
+            self.session_id, session_state = latest_session
             print(f"\n✅ Using existing session: {self.session_id}")
 
-            # Get the current session data to show order status
-            session = session_state.sessions[0]
-            if session.state:
-                print(format_order_state_for_display(session.state))
-                print(get_order_status_message(session.state))
+            # Show order status straight from the stored session state
+            if session_state:
+                print(format_order_state_for_display(session_state))
+                print(get_order_status_message(session_state))
         else:
             session = await self.session_service.create_session(
                 app_name=self.app_name,
@@ -72,6 +157,14 @@ class CLIRunner:
             print(f"\n🆕 Created new session: {self.session_id}")
             print(get_order_status_message(DEFAULT_ORDER_STATE))
 
+    async def start(self, timer: StartupTimer | None = None):
+        from utils import call_agent_async
+
+        if self.session_id is None:
+            await self.resume_or_create_session()
+        if timer:
+            print(timer.report())
+
         print("\n🍕 Welcome to the Pizza Order Assistant!")
         print(
             "Type 'exit' to quit, 'menu' to see the menu, or 'order' to view your current order."
@@ -79,7 +172,8 @@ class CLIRunner:
         print("-" * 50)
 
         while True:
-            user_input = input("\n🗣️  You: ").strip()
+            # Read input on a worker thread so the event loop keeps running
+            user_input = (await asyncio.to_thread(input, "\n🗣️  You: ")).strip()
             if user_input.lower() == "exit":
                 break
 
@@ -88,13 +182,28 @@ class CLIRunner:
                 continue
 
             try:
+                if self.stream:
+                    await self._stream_response(user_input)
+                    continue
+
                 # Call the agent and get response
-                agent_response = await call_agent_async(
-                    user_input=user_input,
-                    runner=self.runner,
-                    user_id=self.user_id,
-                    session_id=self.session_id,
-                )
+                if self.response_cache is not None:
+                    from response_cache import call_agent_cached
+
+                    agent_response = await call_agent_cached(
+                        user_input=user_input,
+                        runner=self.runner,
+                        user_id=self.user_id,
+                        session_id=self.session_id,
+                        cache=self.response_cache,
+                    )
+                else:
+                    agent_response = await call_agent_async(
+                        user_input=user_input,
+                        runner=self.runner,
+                        user_id=self.user_id,
+                        session_id=self.session_id,
+                    )
 
                 if agent_response:
                     print(f"\n🤖 Pizza Assistant: {agent_response}")
@@ -108,19 +217,224 @@ class CLIRunner:
                 print("Please try again or type 'exit' to quit.")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pizza Order Assistant")
+    parser.add_argument(
+        "--serve",
+        choices=["stdio", "socket"],
+        help="Serve many sessions from JSONL requests instead of the interactive CLI",
+    )
+    parser.add_argument(
+        "--socket-path",
+        default="./pizza_order_agent.sock",
+        help="Unix socket path used with --serve socket",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Show the assistant's reply progressively as it is generated",
+    )
+    parser.add_argument(
+        "--startup-timing",
+        action="store_true",
+        help="Report how long each startup phase took",
+    )
+    parser.add_argument(
+        "--trace-tools",
+        action="store_true",
+        help="Print every tool call",
+    )
+    parser.add_argument(
+        "--tool-metrics",
+        help="Write tool call metrics here on exit (.prom for Prometheus text, else JSON)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of agent turns running at the same time",
+    )
+    parser.add_argument(
+        "--parallel-session-turns",
+        action="store_true",
+        help="With --serve, run turns of the same session concurrently instead of in order",
+    )
+    parser.add_argument(
+        "--async-db",
+        action="store_true",
+        help="Run database work on aiosqlite threads instead of the event loop",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="Answer repeated read-only questions (menu, current order) from a cache",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=300.0,
+        help="Seconds a cached response stays valid",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Maximum number of cached responses",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="With --serve, shard sessions by user over this many worker processes",
+    )
+    return parser.parse_args()
+
+
+def create_response_cache(args):
+    if not args.response_cache:
+        return None
+    from response_cache import ResponseCache
+
+    return ResponseCache(max_entries=args.cache_size, ttl_seconds=args.cache_ttl)
+
+
+def write_tool_metrics(path: str):
+    from pizza_order_agent.instrumentation import TOOL_METRICS
+
+    with open(path, "w") as f:
+        if path.endswith(".prom"):
+            f.write(TOOL_METRICS.to_prometheus())
+        else:
+            f.write(TOOL_METRICS.to_json())
+
+
+async def serve(args, app_name: str, session_service, response_cache=None, timer=None):
+    from server import SessionServer
+
+    timer = timer or StartupTimer()
+    with timer.phase("import agent"):
+        agent = load_agent()
+    with timer.phase("runner"):
+        server = SessionServer(
+            agent=agent,
+            app_name=app_name,
+            session_service=session_service,
+            default_state=DEFAULT_ORDER_STATE,
+            max_concurrency=args.max_concurrency,
+            response_cache=response_cache,
+            serialize_sessions=not args.parallel_session_turns,
+        )
+    if args.startup_timing:
+        # stdout carries the responses
+        print(timer.report(), file=sys.stderr)
+    if args.serve == "socket":
+        await server.serve_unix_socket(args.socket_path)
+    else:
+        await server.serve_stdio()
+
+
+def worker_commands(args) -> list[list[str]]:
+    """
+    Command lines of the `--serve stdio` worker processes behind --workers
+    """
+    commands = []
+    for index in range(args.workers):
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--serve",
+            "stdio",
+            "--max-concurrency",
+            str(args.max_concurrency),
+        ]
+        if args.async_db:
+            command.append("--async-db")
+        if args.trace_tools:
+            # Traces go to the worker's stderr, which the dispatcher passes through
+            command.append("--trace-tools")
+        if args.parallel_session_turns:
+            command.append("--parallel-session-turns")
+        if args.response_cache:
+            # Each worker keeps its own cache for the users it owns
+            command += [
+                "--response-cache",
+                "--cache-ttl",
+                str(args.cache_ttl),
+                "--cache-size",
+                str(args.cache_size),
+            ]
+        if args.tool_metrics:
+            # One metrics file per worker, e.g. tool_metrics.worker0.prom
+            root, ext = os.path.splitext(args.tool_metrics)
+            command += ["--tool-metrics", f"{root}.worker{index}{ext}"]
+        commands.append(command)
+    return commands
+
+
+async def serve_sharded(args):
+    from sharded_server import ShardedServer
+
+    server = ShardedServer(worker_commands(args))
+    await server.start()
+    try:
+        if args.serve == "socket":
+            await server.serve_unix_socket(args.socket_path)
+        else:
+            await server.serve_stdio()
+    finally:
+        await server.stop()
+
+
 async def main():
     # Create database session service
     APP_NAME = "Pizza Agent"
     USER_ID = "Phineas"
 
-    db_url = "sqlite:///./pizza_order_agent_data.db"
-    db_session_service = DatabaseSessionService(db_url=db_url)
+    args = parse_args()
+    timer = StartupTimer()
 
-    cli_runner = CLIRunner(
-        app_name=APP_NAME, user_id=USER_ID, session_service=db_session_service
-    )
+    if args.serve and args.workers > 1:
+        # The dispatcher only forwards JSON lines; the workers load the agent
+        await serve_sharded(args)
+        return
+
+    if args.trace_tools:
+        from pizza_order_agent.instrumentation import (
+            print_tool_call,
+            set_tool_call_hook,
+        )
+
+        set_tool_call_hook(print_tool_call)
+
+    with timer.phase("session service"):
+        db_session_service = create_session_service(args.async_db)
+
+    response_cache = create_response_cache(args)
+
+    try:
+        if args.serve:
+            await serve(args, APP_NAME, db_session_service, response_cache, timer)
+            return
+
+        # The agent is imported when the first message needs the runner
+        cli_runner = CLIRunner(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_service=db_session_service,
+            stream=args.stream,
+            response_cache=response_cache,
+        )
+
+        with timer.phase("resume session"):
+            await cli_runner.resume_or_create_session()
 
-    await cli_runner.start()
+        await cli_runner.start(timer if args.startup_timing else None)
+    finally:
+        await db_session_service.close()
+        if args.tool_metrics:
+            write_tool_metrics(args.tool_metrics)
+        if response_cache is not None:
+            print(response_cache.summary(), file=sys.stderr)
 
     print(
         """
@@ -0,0 +1,142 @@
+"""
+Optimistic concurrency for session state.
+
+Two turns on the same session, say from a web tab and the CLI, each read
+the state when they start and write their changes when they end. Without
+coordination the later write replaces the earlier one: both turns rewrite
+the whole order, so toppings one of them added are lost.
+
+Every session-scoped state key has a version number, kept in the state
+under VERSIONS_KEY and bumped by each write of the key. A StateJournal
+records the version and value of every key a turn changes, as they were
+when the turn first changed it. When the turn is persisted, keys whose
+stored version still matches are written as they are. Keys another writer
+changed in the meantime are three-way merged with the key's merge function
+(the order is merged field by field), and keys without one raise
+StateConflictError.
+
+The new state is written with a compare-and-set against the state it was
+computed from. If another writer got in between, the turn's changes are
+rebased on the fresh state and written again, so no lock is held while a
+turn runs and a retry costs one row read.
+"""
+
+from typing import Any, Callable, Mapping, Optional
+
+from google.adk.sessions.database_session_service import StorageSession
+from google.adk.sessions.state import State
+from sqlalchemy import func, update
+
+from pizza_order_agent.order_state import (
+    ORDER_KEY,
+    OrderState,
+    load_order,
+    merge_orders,
+)
+
+VERSIONS_KEY = "_versions"
+
+# Compare-and-set attempts before a turn's write is given up
+MAX_WRITE_ATTEMPTS = 8
+
+# (base, mine, theirs) -> merged value
+Merger = Callable[[Any, Any, Any], Any]
+
+
+class StateConflictError(Exception):
+    """
+    A turn's state change could not be reconciled with a concurrent one
+    """
+
+
+def _merge_order(base: Any, mine: Any, theirs: Any) -> list:
+    def order(value) -> OrderState:
+        return load_order({ORDER_KEY: value})
+
+    return merge_orders(order(base), order(mine), order(theirs)).to_compact()
+
+
+# How concurrent writes of each state key are reconciled
+MERGERS: dict[str, Merger] = {ORDER_KEY: _merge_order}
+
+
+def _session_scoped(key: str) -> bool:
+    return key != VERSIONS_KEY and not key.startswith(
+        (State.APP_PREFIX, State.USER_PREFIX, State.TEMP_PREFIX)
+    )
+
+
+class StateJournal:
+    """
+    Base version and value of each session state key a turn changed.
+    """
+
+    __slots__ = ("base",)
+
+    def __init__(self):
+        self.base: dict[str, tuple[int, Any]] = {}
+
+    def record(
+        self, state: Mapping[str, Any], state_delta: Optional[Mapping[str, Any]]
+    ):
+        """
+        Note the keys state_delta is about to change in state
+        """
+        if not state_delta:
+            return
+        versions = state.get(VERSIONS_KEY) or {}
+        for key in state_delta:
+            if _session_scoped(key) and key not in self.base:
+                self.base[key] = (versions.get(key, 0), state.get(key))
+
+    def rebase(
+        self, stored_state: Mapping[str, Any], session_state_delta: Mapping[str, Any]
+    ) -> dict[str, Any]:
+        """
+        The delta to write over stored_state: the turn's changes, merged
+        where another writer changed the same key, with versions bumped
+        """
+        versions = dict(stored_state.get(VERSIONS_KEY) or {})
+        delta = {}
+        for key, value in session_state_delta.items():
+            if key == VERSIONS_KEY:
+                continue
+            version = versions.get(key, 0)
+            base_version, base_value = self.base.get(key, (version, None))
+            if version != base_version:
+                merge = MERGERS.get(key)
+                if merge is None:
+                    raise StateConflictError(
+                        f"State key '{key}' was changed by another writer "
+                        f"(version {base_version} -> {version})"
+                    )
+                value = merge(base_value, value, stored_state.get(key))
+            delta[key] = value
+            versions[key] = version + 1
+        if delta:
+            delta[VERSIONS_KEY] = versions
+        return delta
+
+
+def conditional_state_update(
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    expected_state: dict[str, Any],
+    new_state: dict[str, Any],
+):
+    """
+    UPDATE of a session's state that only matches while it is still
+    expected_state; a rowcount of 0 means another writer got in first
+    """
+    return (
+        update(StorageSession)
+        .where(
+            StorageSession.app_name == app_name,
+            StorageSession.user_id == user_id,
+            StorageSession.id == session_id,
+            StorageSession.state == expected_state,
+        )
+        .values(state=new_state, update_time=func.now())
+        .execution_options(synchronize_session=False)
+    )
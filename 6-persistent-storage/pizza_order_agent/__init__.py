@@ -1 +1,9 @@
-from . import agent  # noqa: F401
+import importlib
+
+
+def __getattr__(name):
+    # Import the agent (ADK and the model client) on first access, so
+    # submodules like order_state can be used without it
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,79 +1,31 @@
-from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
-PIZZA_MENU = {
-    "margherita": {
-        "base_price": 12.99,
-        "description": "Classic tomato sauce, mozzarella, and basil",
-    },
-    "pepperoni": {
-        "base_price": 14.99,
-        "description": "Tomato sauce, mozzarella, and pepperoni",
-    },
-    "supreme": {
-        "base_price": 18.99,
-        "description": "Tomato sauce, mozzarella, pepperoni, sausage, peppers, onions, mushrooms",
-    },
-    "hawaiian": {
-        "base_price": 16.99,
-        "description": "Tomato sauce, mozzarella, ham, and pineapple",
-    },
-    "meat_lovers": {
-        "base_price": 19.99,
-        "description": "Tomato sauce, mozzarella, pepperoni, sausage, ham, and bacon",
-    },
-    "veggie": {
-        "base_price": 15.99,
-        "description": "Tomato sauce, mozzarella, peppers, onions, mushrooms, and olives",
-    },
-}
-
-SIZE_MULTIPLIERS = {"small": 0.8, "medium": 1.0, "large": 1.3, "extra_large": 1.6}
-
-AVAILABLE_TOPPINGS = {
-    "pepperoni": 2.00,
-    "sausage": 2.00,
-    "mushrooms": 1.50,
-    "peppers": 1.50,
-    "onions": 1.50,
-    "olives": 1.50,
-    "extra_cheese": 2.50,
-    "bacon": 2.50,
-    "ham": 2.00,
-    "pineapple": 1.50,
-}
+from .catalog import get_catalog
+from .instructions import pizza_instruction
+from .instrumentation import instrumented
+from .menu_display import menu_payload
+from .name_matching import match_pizza_type, match_size, match_topping
+from .normalization import normalize_address, normalize_phone
+from .order_state import Status, load_order
+from .order_totals import update_order_totals
+from .parallel_tools import ORDER_FIELDS, ParallelToolAgent, StateAccess
+from .pricing import get_pricing_engine, to_dollars
+from .toppings import decode_toppings
 
 
+@instrumented
 def display_menu(tool_context: ToolContext) -> dict:
-    print("--- Tool: display_menu called ---")
-
-    menu_text = "🍕 **PIZZA MENU** 🍕\n\n"
-
-    for pizza_name, details in PIZZA_MENU.items():
-        menu_text += f"**{pizza_name.replace('_', ' ').title()}** - ${details['base_price']:.2f}\n"
-        menu_text += f"   {details['description']}\n\n"
-
-    menu_text += "\n**SIZES & PRICING:**\n"
-    menu_text += "- Small (80% of base price)\n"
-    menu_text += "- Medium (base price)\n"
-    menu_text += "- Large (130% of base price)\n"
-    menu_text += "- Extra Large (160% of base price)\n\n"
-
-    menu_text += "**ADDITIONAL TOPPINGS:**\n"
-    for topping, price in AVAILABLE_TOPPINGS.items():
-        menu_text += f"- {topping.replace('_', ' ').title()}: +${price:.2f}\n"
-
-    return {"action": "display_menu", "menu": menu_text}
+    return menu_payload()
 
 
+@instrumented
 def set_pizza_type(pizza_type: str, tool_context: ToolContext) -> dict:
-    print(f"--- Tool: set_pizza_type called with '{pizza_type}' ---")
-
-    pizza_type_lower = pizza_type.lower()
+    catalog = get_catalog()
+    pizza_type_lower = match_pizza_type(pizza_type, catalog)
 
-    if pizza_type_lower not in PIZZA_MENU:
+    if pizza_type_lower is None:
         available_pizzas = ", ".join(
-            [p.replace("_", " ").title() for p in PIZZA_MENU.keys()]
+            [p.replace("_", " ").title() for p in catalog.pizza_menu.keys()]
         )
         return {
             "action": "set_pizza_type",
@@ -81,28 +33,32 @@ def set_pizza_type(pizza_type: str, tool_context: ToolContext) -> dict:
             "message": f"Pizza type '{pizza_type}' is not available. Available pizzas: {available_pizzas}",
         }
 
-    tool_context.state["pizza_type"] = pizza_type_lower
-    tool_context.state["status"] = "PIZZA_SELECTED"
+    order = load_order(tool_context.state)
+    order.pizza_type = catalog.PizzaType[pizza_type_lower]
+    order.status = Status.PIZZA_SELECTED
+    order_total = update_order_totals(order, pizza_changed=True)
+    order.save(tool_context.state)
 
-    pizza_info = PIZZA_MENU[pizza_type_lower]
+    pizza_info = catalog.pizza_menu[pizza_type_lower]
 
     return {
         "action": "set_pizza_type",
         "pizza_type": pizza_type_lower,
         "description": pizza_info["description"],
         "base_price": pizza_info["base_price"],
-        "message": f"Great choice! Selected {pizza_type.title()} pizza (${pizza_info['base_price']:.2f}). {pizza_info['description']}",
+        "order_total": order_total,
+        "message": f"Great choice! Selected {pizza_type_lower.replace('_', ' ').title()} pizza (${pizza_info['base_price']:.2f}). {pizza_info['description']}",
     }
 
 
+@instrumented
 def set_pizza_size(size: str, tool_context: ToolContext) -> dict:
-    print(f"--- Tool: set_pizza_size called with '{size}' ---")
+    catalog = get_catalog()
+    size_lower = match_size(size, catalog)
 
-    size_lower = size.lower()
-
-    if size_lower not in SIZE_MULTIPLIERS:
+    if size_lower is None:
         available_sizes = ", ".join(
-            [s.replace("_", " ").title() for s in SIZE_MULTIPLIERS.keys()]
+            [s.replace("_", " ").title() for s in catalog.size_multipliers.keys()]
         )
         return {
             "action": "set_pizza_size",
@@ -110,40 +66,46 @@ def set_pizza_size(size: str, tool_context: ToolContext) -> dict:
             "message": f"Size '{size}' is not available. Available sizes: {available_sizes}",
         }
 
-    tool_context.state["size"] = size_lower
-    tool_context.state["status"] = "SIZE_SELECTED"
+    order = load_order(tool_context.state)
+    order.size = catalog.Size[size_lower]
+    order.status = Status.SIZE_SELECTED
+    order_total = update_order_totals(order, pizza_changed=True)
+    order.save(tool_context.state)
 
-    multiplier = SIZE_MULTIPLIERS[size_lower]
+    multiplier = catalog.size_multipliers[size_lower]
 
     return {
         "action": "set_pizza_size",
         "size": size_lower,
         "multiplier": multiplier,
-        "message": f"Perfect! Selected {size.replace('_', ' ').title()} size (price multiplier: {multiplier}x)",
+        "order_total": order_total,
+        "message": f"Perfect! Selected {size_lower.replace('_', ' ').title()} size (price multiplier: {multiplier}x)",
     }
 
 
+@instrumented
 def add_toppings(toppings: list[str], tool_context: ToolContext) -> dict:
-    print(f"--- Tool: add_toppings called with {toppings} ---")
-
+    catalog = get_catalog()
     # Get current toppings from state
-    current_toppings = tool_context.state.get("toppings", [])
+    order = load_order(tool_context.state)
+    toppings_mask = order.toppings_mask
 
     # Validate toppings
     invalid_toppings = []
     valid_toppings = []
 
     for topping in toppings:
-        topping_lower = topping.lower()
-        if topping_lower in AVAILABLE_TOPPINGS:
-            if topping_lower not in current_toppings:
-                valid_toppings.append(topping_lower)
-        else:
+        topping_lower = match_topping(topping, catalog)
+        bit = catalog.topping_bits.get(topping_lower)
+        if bit is None:
             invalid_toppings.append(topping)
+        elif not toppings_mask & bit:
+            toppings_mask |= bit
+            valid_toppings.append(topping_lower)
 
     if invalid_toppings:
         available_toppings = ", ".join(
-            [t.replace("_", " ").title() for t in AVAILABLE_TOPPINGS.keys()]
+            [t.replace("_", " ").title() for t in catalog.toppings.keys()]
         )
         return {
             "action": "add_toppings",
@@ -152,43 +114,47 @@ def add_toppings(toppings: list[str], tool_context: ToolContext) -> dict:
             "message": f"Invalid toppings: {', '.join(invalid_toppings)}. Available toppings: {available_toppings}",
         }
 
-    current_toppings.extend(valid_toppings)
-    tool_context.state["toppings"] = current_toppings
+    order.toppings_mask = toppings_mask
 
-    topping_prices = {
-        topping: AVAILABLE_TOPPINGS[topping] for topping in valid_toppings
-    }
+    topping_prices = {topping: catalog.toppings[topping] for topping in valid_toppings}
     total_topping_cost = sum(topping_prices.values())
+    order_total = update_order_totals(order, toppings_changed=True, catalog=catalog)
+    order.save(tool_context.state)
 
     return {
         "action": "add_toppings",
         "added_toppings": valid_toppings,
         "topping_prices": topping_prices,
         "total_topping_cost": total_topping_cost,
-        "all_toppings": current_toppings,
+        "all_toppings": decode_toppings(toppings_mask, catalog),
+        "order_total": order_total,
         "message": f"Added toppings: {', '.join([t.replace('_', ' ').title() for t in valid_toppings])}. Extra cost: ${total_topping_cost:.2f}",
     }
 
 
+@instrumented
 def remove_toppings(toppings: list[str], tool_context: ToolContext) -> dict:
-    print(f"--- Tool: remove_toppings called with {toppings} ---")
-
+    catalog = get_catalog()
     # Get current toppings from state
-    current_toppings = tool_context.state.get("toppings", [])
+    order = load_order(tool_context.state)
+    toppings_mask = order.toppings_mask
 
     removed_toppings = []
     not_found_toppings = []
 
     for topping in toppings:
-        topping_lower = topping.lower()
-        if topping_lower in current_toppings:
-            current_toppings.remove(topping_lower)
+        topping_lower = match_topping(topping, catalog)
+        bit = catalog.topping_bits.get(topping_lower, 0)
+        if toppings_mask & bit:
+            toppings_mask ^= bit
             removed_toppings.append(topping_lower)
         else:
             not_found_toppings.append(topping)
 
     # Update state
-    tool_context.state["toppings"] = current_toppings
+    order.toppings_mask = toppings_mask
+    order_total = update_order_totals(order, toppings_changed=True, catalog=catalog)
+    order.save(tool_context.state)
 
     message = ""
     if removed_toppings:
@@ -202,14 +168,14 @@ def remove_toppings(toppings: list[str], tool_context: ToolContext) -> dict:
         "action": "remove_toppings",
         "removed_toppings": removed_toppings,
         "not_found_toppings": not_found_toppings,
-        "remaining_toppings": current_toppings,
+        "remaining_toppings": decode_toppings(toppings_mask, catalog),
+        "order_total": order_total,
         "message": message.strip(),
     }
 
 
+@instrumented
 def set_quantity(quantity: int, tool_context: ToolContext) -> dict:
-    print(f"--- Tool: set_quantity called with {quantity} ---")
-
     if quantity < 1 or quantity > 20:
         return {
             "action": "set_quantity",
@@ -217,28 +183,30 @@ def set_quantity(quantity: int, tool_context: ToolContext) -> dict:
             "message": "Quantity must be between 1 and 20 pizzas",
         }
 
-    tool_context.state["quantity"] = quantity
+    order = load_order(tool_context.state)
+    order.quantity = quantity
+    order_total = update_order_totals(order)
+    order.save(tool_context.state)
 
     return {
         "action": "set_quantity",
         "quantity": quantity,
+        "order_total": order_total,
         "message": f"Set quantity to {quantity} pizza{'s' if quantity > 1 else ''}",
     }
 
 
+@instrumented
 def set_delivery_info(
     address: str, phone_number: str, tool_context: ToolContext
 ) -> dict:
-    print(
-        f"--- Tool: set_delivery_info called with address: '{address}', phone: '{phone_number}' ---"
-    )
-
     errors = []
 
-    if not address or len(address.strip()) < 10:
+    address_clean = normalize_address(address) if address else ""
+    if len(address_clean) < 10:
         errors.append("Address must be at least 10 characters long")
 
-    phone_clean = "".join(filter(str.isdigit, phone_number))
+    phone_clean = normalize_phone(phone_number)
     if len(phone_clean) not in [10, 11]:
         errors.append("Phone number must be 10 or 11 digits")
 
@@ -250,26 +218,28 @@ def set_delivery_info(
             "message": f"Validation failed: {'; '.join(errors)}",
         }
 
-    tool_context.state["address"] = address.strip()
-    tool_context.state["phone_number"] = phone_clean
-    tool_context.state["status"] = "DELIVERY_INFO_SET"
+    order = load_order(tool_context.state)
+    order.address = address_clean
+    order.phone_number = phone_clean
+    order.status = Status.DELIVERY_INFO_SET
+    order.save(tool_context.state)
 
     return {
         "action": "set_delivery_info",
-        "address": address.strip(),
+        "address": address_clean,
         "phone_number": phone_clean,
-        "message": f"Delivery info set! Address: {address.strip()}, Phone: {phone_clean}",
+        "message": f"Delivery info set! Address: {address_clean}, Phone: {phone_clean}",
     }
 
 
+@instrumented
 def calculate_total_price(tool_context: ToolContext) -> dict:
-    print("--- Tool: calculate_total_price called ---")
-
     # Get order details from state
-    pizza_type = tool_context.state.get("pizza_type")
-    size = tool_context.state.get("size")
-    toppings = tool_context.state.get("toppings", [])
-    quantity = tool_context.state.get("quantity", 1)
+    order = load_order(tool_context.state)
+    pizza_type = order.pizza_name
+    size = order.size_name
+    toppings = order.toppings
+    quantity = order.quantity
 
     if not pizza_type or not size:
         return {
@@ -278,18 +248,20 @@ def calculate_total_price(tool_context: ToolContext) -> dict:
             "message": "Cannot calculate price: Pizza type and size must be selected first",
         }
 
-    base_price = PIZZA_MENU[pizza_type]["base_price"]
-    size_multiplier = SIZE_MULTIPLIERS[size]
-    pizza_price = base_price * size_multiplier
+    quote = get_pricing_engine().quote(pizza_type, size, toppings, quantity)
 
-    toppings_price = sum(AVAILABLE_TOPPINGS[topping] for topping in toppings)
+    base_price = to_dollars(quote.base_cents)
+    size_multiplier = quote.size_multiplier
+    pizza_price = to_dollars(quote.pizza_cents)
+    toppings_price = to_dollars(quote.toppings_cents)
+    price_per_pizza = to_dollars(quote.price_per_pizza_cents)
+    subtotal = to_dollars(quote.subtotal_cents)
+    tax = to_dollars(quote.tax_cents)
+    total_price = to_dollars(quote.total_cents)
 
-    price_per_pizza = pizza_price + toppings_price
-    subtotal = price_per_pizza * quantity
-    tax = subtotal * 0.08  # 8% tax
-    total_price = subtotal + tax
-
-    tool_context.state["total_price"] = total_price
+    order.pizza_cents = quote.pizza_cents
+    order.toppings_cents = quote.toppings_cents
+    order.save(tool_context.state)
 
     return {
         "action": "calculate_total_price",
@@ -309,119 +281,101 @@ def calculate_total_price(tool_context: ToolContext) -> dict:
     }
 
 
+@instrumented
 def view_current_order(tool_context: ToolContext) -> dict:
-    print("--- Tool: view_current_order called ---")
-
-    state = tool_context.state
+    order = load_order(tool_context.state)
 
     # Build order summary
     order_summary = "🍕 **CURRENT ORDER SUMMARY** 🍕\n\n"
 
-    pizza_type = state.get("pizza_type")
+    pizza_type = order.pizza_name
     if pizza_type:
-        pizza_info = PIZZA_MENU[pizza_type]
+        pizza_info = get_catalog().pizza_menu[pizza_type]
         order_summary += f"Pizza: {pizza_type.replace('_', ' ').title()}\n"
         order_summary += f"Description: {pizza_info['description']}\n"
     else:
         order_summary += "Pizza: Not selected\n"
 
-    size = state.get("size")
+    size = order.size_name
     if size:
         order_summary += f"Size: {size.replace('_', ' ').title()}\n"
     else:
         order_summary += "Size: Not selected\n"
 
-    toppings = state.get("toppings", [])
+    toppings = order.toppings
     if toppings:
         toppings_str = ", ".join([t.replace("_", " ").title() for t in toppings])
         order_summary += f"Extra Toppings: {toppings_str}\n"
     else:
         order_summary += "Extra Toppings: None\n"
 
-    quantity = state.get("quantity", 1)
+    quantity = order.quantity
     order_summary += f"Quantity: {quantity}\n"
 
-    address = state.get("address")
+    address = order.address
     if address:
         order_summary += f"Delivery Address: {address}\n"
     else:
         order_summary += "Delivery Address: Not provided\n"
 
-    phone = state.get("phone_number")
+    phone = order.phone_number
     if phone:
         order_summary += f"Phone Number: {phone}\n"
     else:
         order_summary += "Phone Number: Not provided\n"
 
-    total_price = state.get("total_price", 0.0)
+    total_price = order.total_price
     if total_price > 0:
         order_summary += f"\n**Total Price: ${total_price:.2f}**\n"
 
-    status = state.get("status", "START")
+    status = order.status.name
     order_summary += f"\nOrder Status: {status}\n"
 
     return {
         "action": "view_current_order",
         "order_summary": order_summary,
-        "order_complete": bool(pizza_type and size and address and phone),
+        "order_complete": order.is_complete,
         "status": status,
     }
 
 
-pizza_order_agent = Agent(
+# Order fields each tool reads and writes, so independent calls in one
+# model response can run concurrently
+TOOL_STATE_ACCESS = {
+    "display_menu": StateAccess(),
+    "set_pizza_type": StateAccess(
+        reads=frozenset({"size"}),
+        writes=frozenset({"pizza_type", "status", "pizza_cents"}),
+    ),
+    "set_pizza_size": StateAccess(
+        reads=frozenset({"pizza_type"}),
+        writes=frozenset({"size", "status", "pizza_cents"}),
+    ),
+    "add_toppings": StateAccess(
+        reads=frozenset({"toppings_mask", "toppings_cents"}),
+        writes=frozenset({"toppings_mask", "toppings_cents"}),
+    ),
+    "remove_toppings": StateAccess(
+        reads=frozenset({"toppings_mask", "toppings_cents"}),
+        writes=frozenset({"toppings_mask", "toppings_cents"}),
+    ),
+    "set_quantity": StateAccess(writes=frozenset({"quantity"})),
+    "set_delivery_info": StateAccess(
+        writes=frozenset({"address", "phone_number", "status"})
+    ),
+    "calculate_total_price": StateAccess(
+        reads=frozenset({"pizza_type", "size", "toppings_mask", "quantity"}),
+        writes=frozenset({"pizza_cents", "toppings_cents"}),
+    ),
+    "view_current_order": StateAccess(reads=ORDER_FIELDS),
+}
+
+
+pizza_order_agent = ParallelToolAgent(
     name="pizza_order_agent",
     model="gemini-2.0-flash",
     description="A specialized assistant for taking pizza orders with persistent state management",
-    instruction="""
-    You are a friendly pizza ordering assistant that helps customers build their perfect pizza order.
-    
-    The order state contains:
-    - status: Current order status (START, PIZZA_SELECTED, SIZE_SELECTED, etc.)
-    - pizza_type: Selected pizza type
-    - size: Selected pizza size  
-    - toppings: list of additional toppings
-    - quantity: Number of pizzas
-    - address: Delivery address
-    - phone_number: Contact phone number
-    - total_price: Calculated total price
-    
-    **ORDER PROCESS GUIDELINES:**
-    
-    1. **Menu Display**: Use display_menu when customers ask about available options
-    
-    2. **Pizza Selection**: Use set_pizza_type when customers choose a pizza
-    
-    3. **Size Selection**: Use set_pizza_size when customers specify size
-    
-    4. **Toppings Management**: 
-       - Use add_toppings to add extra toppings
-       - Use remove_toppings to remove toppings
-       - Be smart about interpreting customer requests
-    
-    5. **Quantity**: Use set_quantity when customers specify how many pizzas
-    
-    6. **Delivery Info**: Use set_delivery_info to collect address and phone
-    
-    7. **Price Calculation**: Use calculate_total_price to show pricing breakdown
-    
-    8. **Order Review**: Use view_current_order to show complete order summary
-    
-    **SMART INTERACTION RULES:**
-    
-    - Always be friendly and conversational
-    - Guide customers through the ordering process naturally
-    - Use your best judgment to interpret customer requests
-    - Don't ask for clarification unless absolutely necessary
-    - Automatically calculate prices when order details change
-    - Suggest popular combinations or upsells appropriately
-    - Confirm important details before finalizing
-    
-    **AVAILABLE PIZZAS:** margherita, pepperoni, supreme, hawaiian, meat_lovers, veggie
-    **AVAILABLE SIZES:** small, medium, large, extra_large  
-    **AVAILABLE TOPPINGS:** pepperoni, sausage, mushrooms, peppers, onions, olives, extra_cheese, bacon, ham, pineapple
-    
-    Remember to keep the conversation natural and helpful while ensuring all order details are captured accurately.
-    """,
+    instruction=pizza_instruction,
     tools=[
         display_menu,
         set_pizza_type,
@@ -433,4 +387,5 @@ pizza_order_agent = Agent(
         calculate_total_price,
         view_current_order,
     ],
+    tool_state_access=TOOL_STATE_ACCESS,
 )
@@ -0,0 +1,390 @@
+"""
+Versioned pizza catalog with hot reload.
+
+Tools and helpers read the menu from get_catalog(), which returns an
+immutable Catalog snapshot. Everything compiled from the catalog (pricing
+tables, menu renderings, name matchers) is memoized on the snapshot's
+version and content, so it is rebuilt once per catalog change and never
+mixed across two catalogs.
+
+The snapshot comes from a catalog source. By default that is the built-in
+menu in menu.py. With PIZZA_CATALOG_DB set to a SQLite file (see
+catalog_admin.py) the catalog is read from there, and get_catalog() checks
+the file's version at most every PIZZA_CATALOG_RELOAD_SECONDS and swaps in
+the new snapshot when it changed, so prices and items can change without a
+restart. Until a catalog is published there, the built-in menu is served.
+
+Pizza types, sizes and toppings are coded by their position in the catalog,
+and those codes are stored in sessions. A new catalog must therefore have a
+higher version and keep every existing entry in place, only appending; one
+that doesn't is rejected and the current snapshot stays in use. The first
+catalog published to a database extends the built-in menu, whose codes
+running processes and stored sessions already use.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from enum import IntEnum
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Protocol
+
+from . import menu
+
+CATALOG_DB = os.getenv("PIZZA_CATALOG_DB")
+RELOAD_SECONDS = float(os.getenv("PIZZA_CATALOG_RELOAD_SECONDS", "2"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_version (version INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS pizzas (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    base_price REAL NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sizes (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    multiplier REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS toppings (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    price REAL NOT NULL
+);
+"""
+
+
+class Catalog:
+    """
+    One immutable version of the menu, with the codes derived from it.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        pizza_menu: Mapping[str, Mapping[str, Any]],
+        size_multipliers: Mapping[str, float],
+        toppings: Mapping[str, float],
+    ):
+        self.version = version
+        self.pizza_menu = MappingProxyType(
+            {
+                name: MappingProxyType(dict(details))
+                for name, details in pizza_menu.items()
+            }
+        )
+        self.size_multipliers = MappingProxyType(dict(size_multipliers))
+        self.toppings = MappingProxyType(dict(toppings))
+
+        # Members are named after the catalog keys, e.g. PizzaType["meat_lovers"]
+        self.PizzaType = IntEnum(
+            "PizzaType", [(name, i) for i, name in enumerate(self.pizza_menu)]
+        )
+        self.Size = IntEnum(
+            "Size", [(name, i) for i, name in enumerate(self.size_multipliers)]
+        )
+        # Members by code; indexing a tuple is much faster than calling the enum
+        self.pizza_codes = tuple(self.PizzaType)
+        self.size_codes = tuple(self.Size)
+
+        # Bit i of a toppings mask is the i-th topping
+        self.topping_names = tuple(self.toppings)
+        self.topping_bits = {name: 1 << i for i, name in enumerate(self.topping_names)}
+
+        # Item order is part of the content, since it defines the codes
+        content = json.dumps(
+            [
+                [
+                    (name, sorted(details.items()))
+                    for name, details in self.pizza_menu.items()
+                ],
+                list(self.size_multipliers.items()),
+                list(self.toppings.items()),
+            ]
+        )
+        self.digest = hashlib.sha256(content.encode()).hexdigest()
+
+    # Snapshots are keyed on their version and content in the caches built
+    # from them, so two sources can't share an entry under the same version
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, Catalog)
+            and self.version == other.version
+            and self.digest == other.digest
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.version, self.digest))
+
+    def __repr__(self) -> str:
+        return (
+            f"Catalog(version={self.version}, pizzas={len(self.pizza_menu)}, "
+            f"sizes={len(self.size_multipliers)}, toppings={len(self.toppings)})"
+        )
+
+    def check_extends(self, previous: "Catalog") -> None:
+        """
+        Raise ValueError unless this catalog only appends to previous
+        """
+        if self.version <= previous.version:
+            raise ValueError(
+                f"Catalog version {self.version} is not newer than {previous.version}"
+            )
+        for kind, old, new in (
+            ("pizza types", previous.pizza_menu, self.pizza_menu),
+            ("sizes", previous.size_multipliers, self.size_multipliers),
+            ("toppings", previous.toppings, self.toppings),
+        ):
+            if tuple(new)[: len(old)] != tuple(old):
+                raise ValueError(
+                    f"Existing {kind} must keep their order; new ones can only be "
+                    f"appended (was {list(old)}, got {list(new)})"
+                )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "pizzas": {
+                name: dict(details) for name, details in self.pizza_menu.items()
+            },
+            "sizes": dict(self.size_multipliers),
+            "toppings": dict(self.toppings),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Catalog":
+        return cls(data["version"], data["pizzas"], data["sizes"], data["toppings"])
+
+
+class CatalogSource(Protocol):
+    """
+    Where catalog snapshots come from
+    """
+
+    def version(self) -> int: ...
+
+    def load(self) -> Catalog: ...
+
+
+class BuiltinCatalogSource:
+    """
+    The menu compiled into menu.py.
+    """
+
+    def version(self) -> int:
+        return menu.CATALOG_VERSION
+
+    def load(self) -> Catalog:
+        return Catalog(
+            menu.CATALOG_VERSION,
+            menu.PIZZA_MENU,
+            menu.SIZE_MULTIPLIERS,
+            menu.AVAILABLE_TOPPINGS,
+        )
+
+
+class SqliteCatalogSource:
+    """
+    Catalog stored in a local SQLite file, one table per kind of item.
+
+    Each read opens its own short-lived connection, so the source is safe to
+    use from tool threads and sees what other processes publish.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def _published_version(db: sqlite3.Connection) -> Optional[int]:
+        # Only publish creates the tables, so polling never writes
+        has_schema = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_version'"
+        ).fetchone()
+        if not has_schema:
+            return None
+        row = db.execute("SELECT version FROM catalog_version").fetchone()
+        return row[0] if row else None
+
+    def version(self) -> int:
+        """
+        The published version, 0 if nothing has been published
+        """
+        if not os.path.exists(self.path):
+            return 0
+        db = sqlite3.connect(self.path)
+        try:
+            return self._published_version(db) or 0
+        finally:
+            db.close()
+
+    def _read(self, db: sqlite3.Connection) -> Optional[Catalog]:
+        version = self._published_version(db)
+        if version is None:
+            return None
+        pizzas = {
+            name: {"base_price": base_price, "description": description}
+            for name, base_price, description in db.execute(
+                "SELECT name, base_price, description FROM pizzas ORDER BY code"
+            )
+        }
+        sizes = dict(db.execute("SELECT name, multiplier FROM sizes ORDER BY code"))
+        toppings = dict(db.execute("SELECT name, price FROM toppings ORDER BY code"))
+        return Catalog(version, pizzas, sizes, toppings)
+
+    def load(self) -> Catalog:
+        catalog = None
+        if os.path.exists(self.path):
+            db = sqlite3.connect(self.path)
+            try:
+                # One read transaction, so the rows all belong to the same version
+                db.execute("BEGIN")
+                catalog = self._read(db)
+            finally:
+                db.close()
+        if catalog is None:
+            raise LookupError(f"No catalog has been published to {self.path}")
+        return catalog
+
+    def publish(self, catalog: Catalog) -> None:
+        """
+        Replace the stored catalog, if catalog only appends to it (or, for
+        the first publish, to the built-in one)
+        """
+        db = sqlite3.connect(self.path)
+        try:
+            db.executescript(SCHEMA)
+            with db:
+                db.execute("BEGIN IMMEDIATE")
+                current = self._read(db)
+                if current is None:
+                    current = BuiltinCatalogSource().load()
+                catalog.check_extends(current)
+                db.execute("DELETE FROM catalog_version")
+                db.execute("DELETE FROM pizzas")
+                db.execute("DELETE FROM sizes")
+                db.execute("DELETE FROM toppings")
+                db.execute("INSERT INTO catalog_version VALUES (?)", (catalog.version,))
+                db.executemany(
+                    "INSERT INTO pizzas VALUES (?, ?, ?, ?)",
+                    [
+                        (code, name, details["base_price"], details["description"])
+                        for code, (name, details) in enumerate(
+                            catalog.pizza_menu.items()
+                        )
+                    ],
+                )
+                db.executemany(
+                    "INSERT INTO sizes VALUES (?, ?, ?)",
+                    [
+                        (code, name, multiplier)
+                        for code, (name, multiplier) in enumerate(
+                            catalog.size_multipliers.items()
+                        )
+                    ],
+                )
+                db.executemany(
+                    "INSERT INTO toppings VALUES (?, ?, ?)",
+                    [
+                        (code, name, price)
+                        for code, (name, price) in enumerate(catalog.toppings.items())
+                    ],
+                )
+        finally:
+            db.close()
+
+
+class CatalogStore:
+    """
+    The current catalog snapshot, reloaded from its source when it changes.
+    """
+
+    def __init__(self, source: CatalogSource, reload_seconds: float = RELOAD_SECONDS):
+        self.source = source
+        self.reload_seconds = reload_seconds
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        try:
+            self._current = source.load()
+        except LookupError as error:
+            # Nothing published yet: serve the built-in menu until something is
+            print(f"⚠️ {error}; serving the built-in catalog", file=sys.stderr)
+            self._current = BuiltinCatalogSource().load()
+        self._next_check = time.monotonic() + reload_seconds
+
+    def get(self) -> Catalog:
+        if time.monotonic() >= self._next_check:
+            self.reload()
+        return self._current
+
+    def reload(self) -> Catalog:
+        """
+        Swap in the source's catalog if its version changed and it
+        extends the current one
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_seconds
+            try:
+                version = self.source.version()
+                # 0: still nothing published
+                if version and version != self._current.version:
+                    catalog = self.source.load()
+                    catalog.check_extends(self._current)
+                    self._current = catalog
+                    self.last_error = None
+            except (sqlite3.Error, LookupError, ValueError) as error:
+                # A bad or half-written catalog never replaces a working one
+                if str(error) != self.last_error:
+                    print(f"⚠️ Catalog reload failed: {error}", file=sys.stderr)
+                self.last_error = str(error)
+            return self._current
+
+
+_store: Optional[CatalogStore] = None
+_store_lock = threading.Lock()
+
+
+def _default_source() -> CatalogSource:
+    if CATALOG_DB:
+        return SqliteCatalogSource(CATALOG_DB)
+    return BuiltinCatalogSource()
+
+
+def get_catalog_store() -> CatalogStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CatalogStore(_default_source())
+    return _store
+
+
+def set_catalog_source(
+    source: CatalogSource, reload_seconds: float = RELOAD_SECONDS
+) -> CatalogStore:
+    """
+    Serve the catalog from another source from now on
+    """
+    global _store
+    with _store_lock:
+        _store = CatalogStore(source, reload_seconds)
+    return _store
+
+
+def get_catalog() -> Catalog:
+    """
+    The current catalog snapshot
+    """
+    return get_catalog_store().get()
+
+
+def load_catalog_file(path: str) -> Catalog:
+    """
+    Read a catalog from JSON with version, pizzas, sizes and toppings keys
+    """
+    with open(path, encoding="utf-8") as f:
+        return Catalog.from_dict(json.load(f))
@@ -0,0 +1,193 @@
+"""
+Agent instruction compiled from named sections and the catalog.
+
+The instruction goes out with every model request, so every token of it is
+paid on every turn. It is assembled from sections, and the catalog section
+is generated from the current catalog snapshot instead of being copied by
+hand, so it follows catalog reloads. Sections are dedented and stripped of
+trailing whitespace before they are joined.
+
+Compact mode (PIZZA_INSTRUCTION_MODE=compact) leaves out what the tools
+already tell the model: the list of order fields, which every tool response
+names; the lists of pizzas, sizes and toppings, which display_menu returns
+and the order tools list when a name isn't on the menu; and the step-by-step
+tool guide, which restates the tool declarations sent with every request,
+keeping only its note on calculate_total_price. Compiled instructions are
+memoized per catalog version and mode, together with an estimate of each
+section's token count.
+"""
+
+import os
+import re
+import textwrap
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Union
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from .catalog import Catalog, get_catalog
+
+INSTRUCTION_MODES = ("full", "compact")
+INSTRUCTION_MODE = os.getenv("PIZZA_INSTRUCTION_MODE", "full")
+
+# A section is text, or a function rendering it from the catalog
+SectionText = Union[str, Callable[[Catalog], str]]
+
+
+class Section(NamedTuple):
+    name: str
+    full: SectionText
+    # None leaves the section out in compact mode
+    compact: Optional[SectionText]
+
+
+class CompiledInstruction(NamedTuple):
+    text: str
+    # Estimated tokens of the whole text and of each section, in order
+    tokens: int
+    section_tokens: dict[str, int]
+
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate subword token count: a token per short word, digit group or
+    punctuation mark, and one more per 6 letters of longer words
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _TOKEN_PIECES.findall(text))
+
+
+ROLE = """
+You are a friendly pizza ordering assistant that helps customers build their perfect pizza order.
+"""
+
+ORDER_FIELDS = """
+The order is kept in session state in a compact encoding; the tools read and update it
+and report its fields by name:
+- status: Current order status (START, PIZZA_SELECTED, SIZE_SELECTED, etc.)
+- pizza_type: Selected pizza type
+- size: Selected pizza size
+- toppings: Extra toppings
+- quantity: Number of pizzas
+- address: Delivery address
+- phone_number: Contact phone number
+- subtotal, tax, total_price: Running order totals, kept up to date by every tool
+"""
+
+PROCESS = """
+**ORDER PROCESS GUIDELINES:**
+
+1. **Menu Display**: Use display_menu when customers ask about available options
+
+2. **Pizza Selection**: Use set_pizza_type when customers choose a pizza
+
+3. **Size Selection**: Use set_pizza_size when customers specify size
+
+4. **Toppings Management**:
+   - Use add_toppings to add extra toppings
+   - Use remove_toppings to remove toppings
+   - Be smart about interpreting customer requests
+
+5. **Quantity**: Use set_quantity when customers specify how many pizzas
+
+6. **Delivery Info**: Use set_delivery_info to collect address and phone
+
+7. **Price Calculation**: Every tool that changes the order returns the current order_total,
+   so only use calculate_total_price when the customer asks for a full pricing breakdown
+
+8. **Order Review**: Use view_current_order to show complete order summary
+"""
+
+RULES = """
+**SMART INTERACTION RULES:**
+
+- Always be friendly and conversational
+- Guide customers through the ordering process naturally
+- Use your best judgment to interpret customer requests
+- Don't ask for clarification unless absolutely necessary
+- Mention the updated total from order_total when order details change
+- Suggest popular combinations or upsells appropriately
+- Confirm important details before finalizing
+"""
+
+COMPACT_PROCESS = """
+Tools that change the order return the current order_total, so only use
+calculate_total_price when the customer asks for a full pricing breakdown.
+"""
+
+CLOSING = """
+Remember to keep the conversation natural and helpful while ensuring all order details are captured accurately.
+"""
+
+
+def _catalog_section(catalog: Catalog) -> str:
+    return (
+        f"**AVAILABLE PIZZAS:** {', '.join(catalog.pizza_menu)}\n"
+        f"**AVAILABLE SIZES:** {', '.join(catalog.size_multipliers)}\n"
+        f"**AVAILABLE TOPPINGS:** {', '.join(catalog.toppings)}"
+    )
+
+
+def _compact_catalog_section(catalog: Catalog) -> str:
+    return (
+        "Pass pizza, size and topping names as the customer says them; "
+        "the tools list the valid options when one isn't on the menu."
+    )
+
+
+SECTIONS = (
+    Section("role", ROLE, ROLE),
+    Section("order_fields", ORDER_FIELDS, None),
+    Section("process", PROCESS, COMPACT_PROCESS),
+    Section("rules", RULES, RULES),
+    Section("catalog", _catalog_section, _compact_catalog_section),
+    Section("closing", CLOSING, CLOSING),
+)
+
+
+def _render(text: SectionText, catalog: Catalog) -> str:
+    if callable(text):
+        text = text(catalog)
+    lines = textwrap.dedent(text).strip().splitlines()
+    return "\n".join(line.rstrip() for line in lines)
+
+
+@lru_cache(maxsize=8)
+def _cached_instruction(catalog: Catalog, compact: bool) -> CompiledInstruction:
+    rendered = {}
+    for section in SECTIONS:
+        text = section.compact if compact else section.full
+        if text is not None:
+            rendered[section.name] = _render(text, catalog)
+    text = "\n\n".join(rendered.values()) + "\n"
+    return CompiledInstruction(
+        text=text,
+        tokens=estimate_tokens(text),
+        section_tokens={name: estimate_tokens(text) for name, text in rendered.items()},
+    )
+
+
+def compile_instruction(
+    catalog: Optional[Catalog] = None, compact: Optional[bool] = None
+) -> CompiledInstruction:
+    """
+    The instruction for a catalog snapshot, the current one by default, in
+    the PIZZA_INSTRUCTION_MODE mode unless compact is given
+    """
+    if compact is None:
+        if INSTRUCTION_MODE not in INSTRUCTION_MODES:
+            raise ValueError(
+                f"Unknown PIZZA_INSTRUCTION_MODE '{INSTRUCTION_MODE}'. "
+                f"Use one of {INSTRUCTION_MODES}"
+            )
+        compact = INSTRUCTION_MODE == "compact"
+    return _cached_instruction(catalog or get_catalog(), compact)
+
+
+def pizza_instruction(context: ReadonlyContext) -> str:
+    """
+    Instruction provider for pizza_order_agent
+    """
+    return compile_instruction().text
@@ -0,0 +1,181 @@
+"""
+Per-tool call counts, latency histograms and error rates.
+
+Every tool registered on pizza_order_agent is wrapped with @instrumented,
+which records into the process-wide TOOL_METRICS registry. The registry can
+be exported as Prometheus text or JSON. Set PIZZA_TOOL_METRICS=0 to turn
+metrics off; the wrapper then only checks for a tool call hook. Call
+tracing (what the tools used to print) is that hook, installed with
+set_tool_call_hook, and works with or without metrics.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+INSTRUMENTATION_ENABLED = os.getenv("PIZZA_TOOL_METRICS", "1") != "0"
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 1.0)
+
+ToolCallHook = Callable[[str, dict[str, Any]], None]
+
+_tool_call_hook: Optional[ToolCallHook] = None
+
+
+class _ToolStats:
+    __slots__ = ("calls", "errors", "total_seconds", "bucket_counts")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class ToolMetrics:
+    """
+    Thread-safe in-process registry of tool metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: dict[str, _ToolStats] = {}
+
+    def record(self, tool_name: str, seconds: float, error: bool):
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        with self._lock:
+            stats = self._tools.get(tool_name)
+            if stats is None:
+                stats = self._tools[tool_name] = _ToolStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.total_seconds += seconds
+            stats.bucket_counts[bucket] += 1
+
+    def reset(self):
+        with self._lock:
+            self._tools.clear()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Copy of the current metrics keyed by tool name
+        """
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "error_rate": stats.errors / stats.calls if stats.calls else 0.0,
+                    "total_seconds": stats.total_seconds,
+                    "buckets": dict(
+                        zip([*map(str, LATENCY_BUCKETS), "+Inf"], stats.bucket_counts)
+                    ),
+                }
+                for name, stats in sorted(self._tools.items())
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP pizza_tool_calls_total Number of tool calls.",
+            "# TYPE pizza_tool_calls_total counter",
+        ]
+        for name, stats in snapshot.items():
+            lines.append(f'pizza_tool_calls_total{{tool="{name}"}} {stats["calls"]}')
+
+        lines.append(
+            "# HELP pizza_tool_errors_total Tool calls that failed or returned an error."
+        )
+        lines.append("# TYPE pizza_tool_errors_total counter")
+        for name, stats in snapshot.items():
+            lines.append(f'pizza_tool_errors_total{{tool="{name}"}} {stats["errors"]}')
+
+        lines.append("# HELP pizza_tool_duration_seconds Tool wall time.")
+        lines.append("# TYPE pizza_tool_duration_seconds histogram")
+        for name, stats in snapshot.items():
+            cumulative = 0
+            for le, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(
+                    f'pizza_tool_duration_seconds_bucket{{tool="{name}",le="{le}"}} {cumulative}'
+                )
+            lines.append(
+                f'pizza_tool_duration_seconds_sum{{tool="{name}"}} {stats["total_seconds"]}'
+            )
+            lines.append(
+                f'pizza_tool_duration_seconds_count{{tool="{name}"}} {stats["calls"]}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+TOOL_METRICS = ToolMetrics()
+
+
+def set_tool_call_hook(hook: Optional[ToolCallHook]):
+    """
+    Install a callback run before every tool call, or None to remove it
+    """
+    global _tool_call_hook
+    _tool_call_hook = hook
+
+
+def print_tool_call(tool_name: str, args: dict[str, Any]):
+    """
+    Tool call hook that prints each call, like the tools used to.
+
+    It writes to stderr, since stdout carries responses in serve mode.
+    """
+    print(f"--- Tool: {tool_name} called with {args} ---", file=sys.stderr)
+
+
+def instrumented(func):
+    """
+    Record call count, latency and errors of a tool function.
+
+    The wrapper keeps the wrapped signature, so ADK builds the same function
+    declaration and still injects tool_context.
+    """
+    tool_name = func.__name__
+
+    def trace(kwargs):
+        if _tool_call_hook is not None:
+            _tool_call_hook(
+                tool_name, {k: v for k, v in kwargs.items() if k != "tool_context"}
+            )
+
+    if not INSTRUMENTATION_ENABLED:
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            trace(kwargs)
+            return func(*args, **kwargs)
+
+        return traced
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace(kwargs)
+        start = time.perf_counter()
+        error = True
+        try:
+            result = func(*args, **kwargs)
+            error = isinstance(result, dict) and result.get("status") == "error"
+            return result
+        finally:
+            TOOL_METRICS.record(tool_name, time.perf_counter() - start, error)
+
+    return wrapper
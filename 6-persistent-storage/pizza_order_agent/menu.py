@@ -0,0 +1,52 @@
+"""
+Built-in pizza catalog.
+
+Tools read the menu through catalog.get_catalog(); this is the catalog it
+serves unless PIZZA_CATALOG_DB points at a published catalog database.
+"""
+
+# Bump whenever the catalog below changes so cached renderings are rebuilt.
+# Entries may only be appended: their positions are stored in sessions
+CATALOG_VERSION = 1
+
+PIZZA_MENU = {
+    "margherita": {
+        "base_price": 12.99,
+        "description": "Classic tomato sauce, mozzarella, and basil",
+    },
+    "pepperoni": {
+        "base_price": 14.99,
+        "description": "Tomato sauce, mozzarella, and pepperoni",
+    },
+    "supreme": {
+        "base_price": 18.99,
+        "description": "Tomato sauce, mozzarella, pepperoni, sausage, peppers, onions, mushrooms",
+    },
+    "hawaiian": {
+        "base_price": 16.99,
+        "description": "Tomato sauce, mozzarella, ham, and pineapple",
+    },
+    "meat_lovers": {
+        "base_price": 19.99,
+        "description": "Tomato sauce, mozzarella, pepperoni, sausage, ham, and bacon",
+    },
+    "veggie": {
+        "base_price": 15.99,
+        "description": "Tomato sauce, mozzarella, peppers, onions, mushrooms, and olives",
+    },
+}
+
+SIZE_MULTIPLIERS = {"small": 0.8, "medium": 1.0, "large": 1.3, "extra_large": 1.6}
+
+AVAILABLE_TOPPINGS = {
+    "pepperoni": 2.00,
+    "sausage": 2.00,
+    "mushrooms": 1.50,
+    "peppers": 1.50,
+    "onions": 1.50,
+    "olives": 1.50,
+    "extra_cheese": 2.50,
+    "bacon": 2.50,
+    "ham": 2.00,
+    "pineapple": 1.50,
+}
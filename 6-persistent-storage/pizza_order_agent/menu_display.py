@@ -0,0 +1,123 @@
+"""
+Pre-rendered menu for display_menu and the CLI.
+
+Renderings are memoized on (catalog version, format), so the menu is only
+rebuilt after the catalog changes and every other call returns the same
+cached string or payload.
+"""
+
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .catalog import Catalog, get_catalog
+
+MENU_FORMATS = ("markdown", "text", "json")
+
+
+def _display_name(name: str) -> str:
+    return name.replace("_", " ").title()
+
+
+def _size_pricing(multiplier: float) -> str:
+    percent = int(round(multiplier * 100))
+    if percent == 100:
+        return "base price"
+    return f"{percent}% of base price"
+
+
+def _render_markdown(catalog: Catalog) -> str:
+    lines = ["🍕 **PIZZA MENU** 🍕", ""]
+    for pizza_name, details in catalog.pizza_menu.items():
+        lines.append(f"**{_display_name(pizza_name)}** - ${details['base_price']:.2f}")
+        lines.append(f"   {details['description']}")
+        lines.append("")
+
+    lines.append("")
+    lines.append("**SIZES & PRICING:**")
+    for size, multiplier in catalog.size_multipliers.items():
+        lines.append(f"- {_display_name(size)} ({_size_pricing(multiplier)})")
+    lines.append("")
+
+    lines.append("**ADDITIONAL TOPPINGS:**")
+    for topping, price in catalog.toppings.items():
+        lines.append(f"- {_display_name(topping)}: +${price:.2f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _render_text(catalog: Catalog) -> str:
+    lines = ["PIZZA MENU", ""]
+    for pizza_name, details in catalog.pizza_menu.items():
+        lines.append(f"{_display_name(pizza_name)} - ${details['base_price']:.2f}")
+        lines.append(f"   {details['description']}")
+
+    lines.append("")
+    lines.append("SIZES:")
+    for size, multiplier in catalog.size_multipliers.items():
+        lines.append(f"  {_display_name(size)} ({_size_pricing(multiplier)})")
+
+    lines.append("")
+    lines.append("TOPPINGS:")
+    for topping, price in catalog.toppings.items():
+        lines.append(f"  {_display_name(topping)} +${price:.2f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _render_json(catalog: Catalog) -> str:
+    return json.dumps(
+        {
+            "pizzas": {
+                name: [details["base_price"], details["description"]]
+                for name, details in catalog.pizza_menu.items()
+            },
+            "sizes": dict(catalog.size_multipliers),
+            "toppings": dict(catalog.toppings),
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+_RENDERERS = {
+    "markdown": _render_markdown,
+    "text": _render_text,
+    "json": _render_json,
+}
+
+
+# Catalog snapshots hash and compare by their version
+@lru_cache(maxsize=8)
+def _cached_menu(catalog: Catalog, fmt: str) -> str:
+    return _RENDERERS[fmt](catalog)
+
+
+@lru_cache(maxsize=2)
+def _cached_payload(catalog: Catalog) -> Mapping[str, str]:
+    return MappingProxyType(
+        {
+            "action": "display_menu",
+            "menu": _cached_menu(catalog, "markdown"),
+        }
+    )
+
+
+def render_menu(fmt: str = "markdown", catalog: Optional[Catalog] = None) -> str:
+    """
+    Return the menu rendered as markdown, plain text or compact JSON
+    """
+    if fmt not in _RENDERERS:
+        raise ValueError(f"Unknown menu format '{fmt}'. Use one of {MENU_FORMATS}")
+    return _cached_menu(catalog or get_catalog(), fmt)
+
+
+def menu_payload(catalog: Optional[Catalog] = None) -> dict:
+    """
+    Return the display_menu tool response.
+
+    The rendered menu is shared; each call gets its own shallow copy of the
+    payload, so a caller changing it can't affect other sessions.
+    """
+    return dict(_cached_payload(catalog or get_catalog()))
@@ -0,0 +1,245 @@
+"""
+Forgiving lookup of pizza, size and topping names.
+
+The model passes names on much as the customer said them ("meat lovers",
+"XL", "mushroom"), and an exact match failure sends it back to correct
+itself with an extra round-trip. Each catalog gets an index built once: an
+exact table of normalized names, spelling variants and aliases, backed by a
+table of their sorted letters for swapped letters and a trigram index that
+resolves other typos by Dice similarity. Any fuzzy match, swapped letters
+included, must also be within a few edits of the name and may not have more
+words than it, so an input with extra words ("supreme veggie", "ham and
+pineapple") or a different word that merely shares letters ("vegan",
+"regal") is rejected and the model asks the customer. A lookup is a dict hit or, for a typo, a few set operations.
+The indexes are memoized on the catalog version like the menu renderings.
+"""
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional
+
+from .catalog import Catalog, get_catalog
+
+# A typo matches when its trigram similarity to a name is at least
+# MIN_SIMILARITY and beats every other name by MIN_MARGIN
+MIN_SIMILARITY = 0.5
+MIN_MARGIN = 0.1
+
+PIZZA_ALIASES = {
+    "margherita": ("margarita", "cheese"),
+    "meat_lovers": ("meat lover", "meat feast", "meaty"),
+    "veggie": ("vegetarian", "veg", "vegetable"),
+    "hawaiian": ("hawaii", "ham and pineapple", "ham pineapple"),
+    "supreme": ("deluxe", "the works"),
+}
+SIZE_ALIASES = {
+    "small": ("s", "sm", "personal", "10 inch"),
+    "medium": ("m", "med", "regular", "12 inch"),
+    "large": ("l", "lg", "14 inch"),
+    "extra_large": ("xl", "x large", "xlarge", "xxl", "family", "16 inch"),
+}
+TOPPING_ALIASES = {
+    "peppers": ("bell pepper", "green pepper", "capsicum"),
+    "extra_cheese": ("cheese", "more cheese", "double cheese", "mozzarella"),
+    "mushrooms": ("shrooms",),
+    "olives": ("black olive",),
+    "sausage": ("italian sausage",),
+}
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+_NON_WORD = re.compile(r"[^a-z0-9 ]")
+
+
+def normalize_name(text: str) -> str:
+    """
+    Lowercase with separators as single spaces and punctuation dropped
+    """
+    text = _SEPARATORS.sub(" ", text.lower())
+    return _NON_WORD.sub("", text).strip()
+
+
+def _trigrams(key: str) -> frozenset[str]:
+    padded = f"  {key} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _edit_distance(a: str, b: str) -> int:
+    # Levenshtein distance counting a swap of adjacent letters as one edit
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _max_edits(key: str) -> int:
+    # Edits a fuzzy match may be away from the name it resolves to
+    return max(1, len(key) // 4)
+
+
+def _variants(normalized: str) -> set[str]:
+    variants = {normalized, normalized.replace(" ", "")}
+    # Singular and plural of the last word
+    if normalized.endswith("s"):
+        variants.add(normalized[:-1])
+    else:
+        variants.add(normalized + "s")
+    variants.discard("")
+    return variants
+
+
+class NameMatcher:
+    """
+    Resolves free-form names to the names of one catalog.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        aliases: Mapping[str, Iterable[str]] = {},
+        filler_words: Iterable[str] = (),
+    ):
+        self.names = tuple(names)
+        self.filler_words = frozenset(filler_words)
+
+        self._exact: dict[str, str] = {}
+        # Most words of any spelling behind each space-free key
+        self._words: dict[str, int] = {}
+        for name in self.names:
+            self._add(name, name)
+        for name, name_aliases in aliases.items():
+            # Aliases of names missing from this catalog are skipped
+            if name not in self.names:
+                continue
+            for alias in name_aliases:
+                self._add(alias, name)
+
+        # Space-free keys of the exact table, by sorted letters and by trigram
+        self._keys = [key for key in self._exact if " " not in key and len(key) > 2]
+        self._anagrams: dict[str, Optional[str]] = {}
+        for key in self._keys:
+            letters = "".join(sorted(key))
+            other = self._anagrams.setdefault(letters, key)
+            if other is not None and self._exact[other] != self._exact[key]:
+                # Shared by two names, so it can't decide between them
+                self._anagrams[letters] = None
+        self._key_grams = [_trigrams(key) for key in self._keys]
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for i, grams in enumerate(self._key_grams):
+            for gram in grams:
+                self._postings[gram].append(i)
+
+    def _add(self, spelling: str, name: str):
+        normalized = normalize_name(spelling)
+        words = len(normalized.split())
+        for variant in _variants(normalized):
+            self._exact.setdefault(variant, name)
+            key = variant.replace(" ", "")
+            self._words[key] = max(self._words.get(key, 0), words)
+
+    def _strip_filler(self, normalized: str) -> str:
+        words = [word for word in normalized.split() if word not in self.filler_words]
+        return " ".join(words) if words else normalized
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        The catalog name text refers to, or None if nothing is close enough
+        """
+        normalized = self._strip_filler(normalize_name(text))
+        name = self._exact.get(normalized) or self._exact.get(
+            normalized.replace(" ", "")
+        )
+        if name is not None or len(normalized) < 3:
+            return name
+        key = normalized.replace(" ", "")
+        words = len(normalized.split())
+        # Swapped letters, as long as the rearrangement is a typo's worth
+        # ("pepperoin") and not another word ("regal" for large)
+        anagram = self._anagrams.get("".join(sorted(key)))
+        if (
+            anagram is not None
+            and self._words[anagram] >= words
+            and _edit_distance(key, anagram) <= _max_edits(key)
+        ):
+            return self._exact[anagram]
+        return self._closest(key, words)
+
+    def _closest(self, key: str, words: int) -> Optional[str]:
+        grams = _trigrams(key)
+        overlaps: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                overlaps[i] += 1
+
+        # Best similarity and the key it came from, per catalog name. Keys
+        # with fewer words than the input would leave a word unexplained
+        best: dict[str, tuple[float, str]] = {}
+        for i, overlap in overlaps.items():
+            if self._words[self._keys[i]] < words:
+                continue
+            similarity = 2 * overlap / (len(grams) + len(self._key_grams[i]))
+            name = self._exact[self._keys[i]]
+            if similarity > best.get(name, (0.0,))[0]:
+                best[name] = (similarity, self._keys[i])
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)
+        if not ranked or ranked[0][1][0] < MIN_SIMILARITY:
+            return None
+        top = ranked[0][1][0]
+        close = [item for item in ranked if top - item[1][0] < MIN_MARGIN]
+
+        # Take the name fewest edits away, if it is near enough to be a typo
+        # and no other close name is as near
+        distances = sorted(
+            (_edit_distance(key, candidate), name) for name, (_, candidate) in close
+        )
+        if distances[0][0] > _max_edits(key):
+            return None
+        if len(distances) > 1 and distances[0][0] == distances[1][0]:
+            return None
+        return distances[0][1]
+
+
+@lru_cache(maxsize=2)
+def _cached_matchers(catalog: Catalog) -> tuple[NameMatcher, NameMatcher, NameMatcher]:
+    return (
+        NameMatcher(
+            catalog.pizza_menu,
+            PIZZA_ALIASES,
+            filler_words=("pizza", "pizzas", "a", "the"),
+        ),
+        NameMatcher(
+            catalog.size_multipliers, SIZE_ALIASES, filler_words=("size", "sized", "a")
+        ),
+        NameMatcher(catalog.toppings, TOPPING_ALIASES, filler_words=("some", "with")),
+    )
+
+
+def get_name_matchers(
+    catalog: Optional[Catalog] = None,
+) -> tuple[NameMatcher, NameMatcher, NameMatcher]:
+    """
+    Pizza type, size and topping matchers of a catalog snapshot, the current
+    one by default
+    """
+    return _cached_matchers(catalog or get_catalog())
+
+
+def match_pizza_type(text: str, catalog: Optional[Catalog] = None) -> Optional[str]:
+    return get_name_matchers(catalog)[0].match(text)
+
+
+def match_size(text: str, catalog: Optional[Catalog] = None) -> Optional[str]:
+    return get_name_matchers(catalog)[1].match(text)
+
+
+def match_topping(text: str, catalog: Optional[Catalog] = None) -> Optional[str]:
+    return get_name_matchers(catalog)[2].match(text)
@@ -0,0 +1,283 @@
+"""
+Typed order state with a compact form for the session database.
+
+The order is a slotted OrderState with the status, pizza type and size coded
+as enums. In session state the whole order is stored under a single key as
+a short JSON list instead of a dozen loose keys:
+
+    [format, status, pizza_type, size, toppings_mask, quantity,
+     address, phone_number, pizza_cents, toppings_cents]
+
+Subtotal, tax and total are derived from the cents fields rather than
+stored. Pizza types and sizes are coded by their position in the catalog,
+which is why a catalog reload may only append to it. Sessions saved
+with the old one-key-per-field layout are still read, and are migrated the
+next time the order changes.
+"""
+
+from dataclasses import dataclass, replace
+from enum import IntEnum
+from typing import Any, Mapping, MutableMapping, Optional
+
+from . import pricing
+from .catalog import Catalog, get_catalog, get_catalog_store
+from .toppings import decode_toppings, get_toppings_mask
+
+ORDER_KEY = "order"
+COMPACT_FORMAT = 1
+
+# Keys of the one-key-per-field layout used before OrderState
+LEGACY_KEYS = (
+    "status",
+    "pizza_type",
+    "size",
+    "toppings",
+    "toppings_mask",
+    "quantity",
+    "address",
+    "phone_number",
+    "pizza_cents",
+    "toppings_cents",
+    "subtotal",
+    "tax",
+    "total_price",
+)
+
+
+class Status(IntEnum):
+    START = 0
+    PIZZA_SELECTED = 1
+    SIZE_SELECTED = 2
+    TOPPINGS_ADDED = 3
+    DELIVERY_INFO_SET = 4
+    ORDER_COMPLETE = 5
+
+
+# Members by code; indexing a tuple is much faster than calling the enum
+_STATUSES = tuple(Status)
+
+
+def _member(enum, name: Optional[str]):
+    if not name:
+        return None
+    try:
+        return enum[name]
+    except KeyError:
+        return None
+
+
+def _code(value: Optional[IntEnum]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def _knows_codes(
+    catalog: Catalog, pizza_type: Optional[int], size: Optional[int], toppings_mask: int
+) -> bool:
+    return (
+        (pizza_type is None or pizza_type < len(catalog.pizza_codes))
+        and (size is None or size < len(catalog.size_codes))
+        and toppings_mask >> len(catalog.topping_names) == 0
+    )
+
+
+@dataclass(slots=True)
+class OrderState:
+    """
+    One customer's pizza order.
+    """
+
+    status: Status = Status.START
+    # Members of the catalog's PizzaType and Size enums
+    pizza_type: Optional[IntEnum] = None
+    size: Optional[IntEnum] = None
+    toppings_mask: int = 0
+    quantity: int = 1
+    address: Optional[str] = None
+    phone_number: Optional[str] = None
+    pizza_cents: int = 0
+    toppings_cents: int = 0
+
+    @property
+    def pizza_name(self) -> Optional[str]:
+        return None if self.pizza_type is None else self.pizza_type.name
+
+    @property
+    def size_name(self) -> Optional[str]:
+        return None if self.size is None else self.size.name
+
+    @property
+    def toppings(self) -> list[str]:
+        return decode_toppings(self.toppings_mask)
+
+    @property
+    def subtotal_cents(self) -> int:
+        # Nothing is priced until both a pizza type and a size are chosen
+        if not self.pizza_cents:
+            return 0
+        return (self.pizza_cents + self.toppings_cents) * self.quantity
+
+    @property
+    def total_cents(self) -> int:
+        subtotal = self.subtotal_cents
+        return subtotal + pricing.tax_cents(subtotal)
+
+    @property
+    def total_price(self) -> float:
+        return pricing.to_dollars(self.total_cents)
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(
+            self.pizza_type is not None
+            and self.size is not None
+            and self.address
+            and self.phone_number
+        )
+
+    def totals(self) -> dict[str, float]:
+        """
+        Subtotal, tax and total in dollars
+        """
+        subtotal = self.subtotal_cents
+        tax = pricing.tax_cents(subtotal)
+        return {
+            "subtotal": pricing.to_dollars(subtotal),
+            "tax": pricing.to_dollars(tax),
+            "total_price": pricing.to_dollars(subtotal + tax),
+        }
+
+    def to_compact(self) -> list:
+        return [
+            COMPACT_FORMAT,
+            int(self.status),
+            _code(self.pizza_type),
+            _code(self.size),
+            self.toppings_mask,
+            self.quantity,
+            self.address,
+            self.phone_number,
+            self.pizza_cents,
+            self.toppings_cents,
+        ]
+
+    @classmethod
+    def from_compact(cls, data: list) -> "OrderState":
+        if not data or data[0] != COMPACT_FORMAT:
+            raise ValueError(f"Unsupported order state format: {data[:1]}")
+        (
+            _,
+            status,
+            pizza_type,
+            size,
+            toppings_mask,
+            quantity,
+            address,
+            phone_number,
+            pizza_cents,
+            toppings_cents,
+        ) = data
+        catalog = get_catalog()
+        if not _knows_codes(catalog, pizza_type, size, toppings_mask):
+            # Saved by a process that already loaded a newer catalog; catalogs
+            # only append, so the newer one knows every code of this one
+            catalog = get_catalog_store().reload()
+            if not _knows_codes(catalog, pizza_type, size, toppings_mask):
+                raise ValueError(
+                    f"Order state uses items missing from catalog version {catalog.version}"
+                )
+        return cls(
+            status=_STATUSES[status],
+            pizza_type=None if pizza_type is None else catalog.pizza_codes[pizza_type],
+            size=None if size is None else catalog.size_codes[size],
+            toppings_mask=toppings_mask,
+            quantity=quantity,
+            address=address,
+            phone_number=phone_number,
+            pizza_cents=pizza_cents,
+            toppings_cents=toppings_cents,
+        )
+
+    @classmethod
+    def from_legacy(cls, state: Mapping[str, Any]) -> "OrderState":
+        """
+        Read an order stored with one state key per field
+        """
+        catalog = get_catalog()
+        order = cls(
+            status=_member(Status, state.get("status")) or Status.START,
+            pizza_type=_member(catalog.PizzaType, state.get("pizza_type")),
+            size=_member(catalog.Size, state.get("size")),
+            toppings_mask=get_toppings_mask(state),
+            quantity=state.get("quantity") or 1,
+            address=state.get("address"),
+            phone_number=state.get("phone_number"),
+        )
+        # Sessions from before running totals existed are priced once here
+        engine = pricing.get_pricing_engine(catalog)
+        pizza_cents = state.get("pizza_cents")
+        if pizza_cents is None:
+            pizza_cents = engine.pizza_cents(order.pizza_name, order.size_name)
+        toppings_cents = state.get("toppings_cents")
+        if toppings_cents is None:
+            toppings_cents = engine.toppings_cents(order.toppings)
+        order.pizza_cents = pizza_cents
+        order.toppings_cents = toppings_cents
+        return order
+
+    def save(self, state: MutableMapping[str, Any]) -> None:
+        """
+        Store the order in session state, writing only what changed
+        """
+        compact = self.to_compact()
+        current = state.get(ORDER_KEY)
+        if current is None:
+            # First save of a session in the old layout. Session state can't
+            # drop keys, so clear them instead
+            for key in LEGACY_KEYS:
+                if state.get(key) is not None:
+                    state[key] = None
+        if current != compact:
+            state[ORDER_KEY] = compact
+
+
+def merge_orders(base: OrderState, mine: OrderState, theirs: OrderState) -> OrderState:
+    """
+    Three-way merge of two concurrent changes to the same order.
+
+    Fields only one side changed keep that change. When both changed a field
+    mine wins, except that every topping either side added or removed is
+    applied and the status keeps the furthest step. Prices are recomputed
+    from the merged order.
+    """
+    merged = replace(theirs)
+    for name in ("pizza_type", "size", "quantity", "address", "phone_number"):
+        value = getattr(mine, name)
+        if value != getattr(base, name):
+            setattr(merged, name, value)
+
+    added = mine.toppings_mask & ~base.toppings_mask
+    removed = base.toppings_mask & ~mine.toppings_mask
+    merged.toppings_mask = (theirs.toppings_mask | added) & ~removed
+
+    if mine.status != base.status:
+        if theirs.status == base.status:
+            merged.status = mine.status
+        else:
+            merged.status = max(mine.status, theirs.status)
+
+    engine = pricing.get_pricing_engine()
+    merged.pizza_cents = engine.pizza_cents(merged.pizza_name, merged.size_name)
+    merged.toppings_cents = engine.toppings_cents(merged.toppings)
+    return merged
+
+
+def load_order(state: Optional[Mapping[str, Any]]) -> OrderState:
+    """
+    Read the order from session state, in either layout
+    """
+    if not state:
+        return OrderState()
+    compact = state.get(ORDER_KEY)
+    if compact is not None:
+        return OrderState.from_compact(compact)
+    return OrderState.from_legacy(state)
@@ -0,0 +1,41 @@
+"""
+Running order totals kept in the order state.
+
+Every mutating tool updates one component of the price (the pizza price, the
+toppings price or the quantity) and the subtotal, tax and total are derived
+from those three integers, so the totals never go stale and never need a
+full reprice. The toppings price is recomputed from the toppings mask rather
+than adjusted by the changed toppings, so a catalog reload that reprices a
+topping between two changes can't leave it off (or below zero).
+"""
+
+from typing import Optional
+
+from .catalog import Catalog
+from .order_state import OrderState
+from .pricing import get_pricing_engine
+from .toppings import decode_toppings
+
+
+def update_order_totals(
+    order: OrderState,
+    *,
+    pizza_changed: bool = False,
+    toppings_changed: bool = False,
+    catalog: Optional[Catalog] = None,
+) -> dict:
+    """
+    Apply one order mutation to the running totals and return them.
+
+    Call with pizza_changed=True after the pizza type or size changed and
+    with toppings_changed=True after toppings were added or removed. Prices
+    come from catalog, the current one by default. Quantity is always read
+    from the order.
+    """
+    engine = get_pricing_engine(catalog)
+    if pizza_changed:
+        order.pizza_cents = engine.pizza_cents(order.pizza_name, order.size_name)
+    if toppings_changed:
+        toppings = decode_toppings(order.toppings_mask, catalog)
+        order.toppings_cents = engine.toppings_cents(toppings)
+    return order.totals()
@@ -0,0 +1,285 @@
+"""
+Concurrent execution of the function calls in one model response.
+
+When a customer says "two large pepperonis with olives, deliver to ...", the
+model answers with several function calls at once. ADK runs them one after
+another, and when it merges their responses it keeps only the last call's
+state_delta. ParallelToolAgent replaces that step:
+
+- Every tool declares which OrderState fields it reads and writes. A call
+  only waits for an earlier call when one of them reads a field the other
+  writes; the rest of a wave are awaited together, so async tools (a
+  database or API call) overlap. Sync tools, like the order tools, run on
+  the event loop: they take microseconds, and a thread pool wouldn't let
+  them overlap under the GIL anyway.
+- Each call works on its own copy of the session state. Afterwards the
+  order fields and state keys they changed are applied in call order, so
+  the result is what running the calls one by one would give, and no call's
+  changes are lost.
+
+Each call goes through ADK's own functions.handle_function_calls_async, so
+tool callbacks and the tool_call / tool_response tracing spans are the same
+as without this module. Tools without a declaration run on their own, after
+every call before them and before every call after them.
+
+ParallelToolFlow overrides AutoFlow._postprocess_handle_function_calls_async,
+which is private to ADK; it is written against google-adk 1.1.1. If an ADK
+upgrade drops that method, ParallelToolAgent falls back to ADK's sequential
+flow rather than silently never running its own.
+"""
+
+import asyncio
+from dataclasses import fields, replace
+from typing import Any, AsyncGenerator, NamedTuple, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.flows.llm_flows import functions
+from google.adk.flows.llm_flows.auto_flow import AutoFlow
+from google.adk.models.llm_request import LlmRequest
+from google.adk.telemetry import trace_tool_response, tracer
+from google.adk.tools import BaseTool
+from google.genai import types
+from pydantic import Field
+
+from .order_state import ORDER_KEY, OrderState, load_order
+
+ORDER_FIELDS = frozenset(field.name for field in fields(OrderState))
+
+
+class StateAccess(NamedTuple):
+    """
+    OrderState fields a tool reads and writes
+    """
+
+    reads: frozenset[str] = frozenset()
+    writes: frozenset[str] = frozenset()
+
+
+def _conflicts(a: Optional[StateAccess], b: Optional[StateAccess]) -> bool:
+    # Two writes of the same field don't conflict: they are applied in call
+    # order whichever finishes first
+    if a is None or b is None:
+        return True
+    return bool(a.reads & b.writes or a.writes & b.reads)
+
+
+def schedule_waves(accesses: list[Optional[StateAccess]]) -> list[list[int]]:
+    """
+    Group call indexes into waves that can each run concurrently.
+
+    A call goes in the wave after the last earlier call it conflicts with.
+    """
+    levels = []
+    for j, access in enumerate(accesses):
+        level = 0
+        for i in range(j):
+            if levels[i] >= level and _conflicts(accesses[i], access):
+                level = levels[i] + 1
+        levels.append(level)
+
+    waves = [[] for _ in range(max(levels, default=-1) + 1)]
+    for index, level in enumerate(levels):
+        waves[level].append(index)
+    return waves
+
+
+class StateMerge:
+    """
+    Session state with the writes of concurrent calls applied in call order.
+    """
+
+    def __init__(self, state: dict[str, Any]):
+        self.state = dict(state)
+        self.order = load_order(state)
+        self.delta: dict[str, Any] = {}
+        self._order_changed = False
+        # Index of the call whose write of each field or key was applied
+        self._writers: dict[str, int] = {}
+
+    def _claim(self, name: str, index: int) -> bool:
+        if self._writers.get(name, -1) > index:
+            return False
+        self._writers[name] = index
+        return True
+
+    def apply(
+        self,
+        index: int,
+        access: Optional[StateAccess],
+        base_order: OrderState,
+        state_delta: dict[str, Any],
+    ):
+        for key, value in state_delta.items():
+            if key != ORDER_KEY:
+                if self._claim(key, index):
+                    self.state[key] = self.delta[key] = value
+                continue
+
+            # The order is merged field by field, so calls that change
+            # different fields of it don't overwrite each other
+            written = OrderState.from_compact(value)
+            declared = access.writes if access else frozenset()
+            for name in ORDER_FIELDS:
+                new = getattr(written, name)
+                if name not in declared and new == getattr(base_order, name):
+                    continue
+                if self._claim(name, index):
+                    setattr(self.order, name, new)
+                    self._order_changed = True
+
+        if self._order_changed:
+            self.state[ORDER_KEY] = self.delta[ORDER_KEY] = self.order.to_compact()
+
+
+def _merge_actions(events: list[Event], state_delta: dict) -> EventActions:
+    actions = EventActions(state_delta=state_delta)
+    for event in events:
+        call_actions = event.actions
+        actions.artifact_delta.update(call_actions.artifact_delta)
+        actions.requested_auth_configs.update(call_actions.requested_auth_configs)
+        if call_actions.skip_summarization:
+            actions.skip_summarization = True
+        if call_actions.escalate:
+            actions.escalate = True
+        if call_actions.transfer_to_agent:
+            actions.transfer_to_agent = call_actions.transfer_to_agent
+    return actions
+
+
+async def handle_function_calls_parallel(
+    invocation_context: InvocationContext,
+    function_call_event: Event,
+    tools_dict: dict[str, BaseTool],
+    state_access: dict[str, StateAccess],
+) -> Optional[Event]:
+    """
+    Run the function calls of one model response and merge their results
+    into a single function response event
+    """
+    agent = invocation_context.agent
+    calls = function_call_event.get_function_calls()
+    for call in calls:
+        if call.name not in tools_dict:
+            raise ValueError(f"Function {call.name} is not found in the tools_dict.")
+
+    accesses = [state_access.get(call.name) for call in calls]
+    merge = StateMerge(invocation_context.session.state)
+    # Response event of each call, None for long-running calls with no
+    # response yet
+    events: list[Optional[Event]] = [None] * len(calls)
+
+    for wave in schedule_waves(accesses):
+        base_order = replace(merge.order)
+        calls_in_wave = []
+        for index in wave:
+            # Each call gets its own copy of the state to write to. The flow
+            # gives every call an id before tools run, so the filter picks
+            # out exactly this one
+            session = invocation_context.session.model_copy(
+                update={"state": dict(merge.state)}
+            )
+            calls_in_wave.append(
+                functions.handle_function_calls_async(
+                    invocation_context.model_copy(update={"session": session}),
+                    function_call_event,
+                    tools_dict,
+                    filters={calls[index].id},
+                )
+            )
+        if len(calls_in_wave) == 1:
+            # Awaiting directly doesn't hand the event loop to other turns
+            results = [await calls_in_wave[0]]
+        else:
+            results = await asyncio.gather(*calls_in_wave)
+        for index, event in zip(wave, results):
+            events[index] = event
+            if event is not None:
+                merge.apply(
+                    index, accesses[index], base_order, event.actions.state_delta
+                )
+
+    events = [event for event in events if event is not None]
+    if not events:
+        return None
+    parts = []
+    totals = merge.order.totals()
+    for event in events:
+        for part in event.content.parts:
+            response = part.function_response.response
+            if "order_total" in response:
+                # Calls that ran side by side each saw only part of the order
+                response["order_total"] = totals
+            parts.append(part)
+
+    merged_event = Event(
+        invocation_id=invocation_context.invocation_id,
+        author=agent.name,
+        branch=invocation_context.branch,
+        content=types.Content(role="user", parts=parts),
+        actions=_merge_actions(events, merge.delta),
+    )
+    if len(events) > 1:
+        # As ADK traces its merged response event
+        with tracer.start_as_current_span("tool_response"):
+            trace_tool_response(
+                invocation_context=invocation_context,
+                event_id=merged_event.id,
+                function_response_event=merged_event,
+            )
+    return merged_event
+
+
+class ParallelToolFlow(AutoFlow):
+    """
+    AutoFlow that runs function calls with handle_function_calls_parallel.
+    """
+
+    def __init__(self, state_access: dict[str, StateAccess]):
+        super().__init__()
+        self.state_access = state_access
+
+    async def _postprocess_handle_function_calls_async(
+        self,
+        invocation_context: InvocationContext,
+        function_call_event: Event,
+        llm_request: LlmRequest,
+    ) -> AsyncGenerator[Event, None]:
+        function_response_event = await handle_function_calls_parallel(
+            invocation_context,
+            function_call_event,
+            llm_request.tools_dict,
+            self.state_access,
+        )
+        if function_response_event is None:
+            return
+        auth_event = functions.generate_auth_event(
+            invocation_context, function_response_event
+        )
+        if auth_event:
+            yield auth_event
+        yield function_response_event
+
+        transfer_to_agent = function_response_event.actions.transfer_to_agent
+        if transfer_to_agent:
+            agent_to_run = self._get_agent_to_run(invocation_context, transfer_to_agent)
+            async for event in agent_to_run.run_async(invocation_context):
+                yield event
+
+
+class ParallelToolAgent(LlmAgent):
+    """
+    LlmAgent that runs independent function calls of a turn concurrently.
+    """
+
+    tool_state_access: dict[str, StateAccess] = Field(default_factory=dict)
+    parallel_tools: bool = True
+
+    @property
+    def _llm_flow(self):
+        if not self.parallel_tools or not hasattr(
+            AutoFlow, "_postprocess_handle_function_calls_async"
+        ):
+            return super()._llm_flow
+        return ParallelToolFlow(self.tool_state_access)
@@ -0,0 +1,264 @@
+"""
+Pricing engine shared by the agent tools and the CLI helpers.
+
+The catalog is compiled once into integer-cent lookup tables so repricing an
+order is a couple of dict lookups and integer adds instead of float math over
+the menu dicts.
+"""
+
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+from .catalog import Catalog, get_catalog
+
+if TYPE_CHECKING:
+    from .order_state import OrderState
+
+TAX_RATE = 0.08
+# Tax rate in basis points so tax can be computed with integer math
+TAX_RATE_BPS = 800
+
+
+def to_cents(amount: float) -> int:
+    """
+    Convert a dollar amount to integer cents
+    """
+    return int(round(amount * 100))
+
+
+def to_dollars(cents: int) -> float:
+    """
+    Convert integer cents back to a dollar amount
+    """
+    return cents / 100
+
+
+def tax_cents(subtotal_cents: int) -> int:
+    """
+    Compute tax on a subtotal, rounding half cents up
+    """
+    return (subtotal_cents * TAX_RATE_BPS + 5000) // 10000
+
+
+class PriceQuote(NamedTuple):
+    base_cents: int
+    size_multiplier: float
+    pizza_cents: int
+    toppings_cents: int
+    quantity: int
+    subtotal_cents: int
+    tax_cents: int
+    total_cents: int
+
+    @property
+    def price_per_pizza_cents(self) -> int:
+        return self.pizza_cents + self.toppings_cents
+
+
+class PricingEngine:
+    """
+    Integer-cent price tables compiled from the pizza catalog.
+    """
+
+    def __init__(
+        self,
+        pizza_menu: Mapping[str, Mapping[str, Any]],
+        size_multipliers: Mapping[str, float],
+        toppings: Mapping[str, float],
+    ):
+        self.pizza_types = tuple(pizza_menu)
+        self.sizes = tuple(size_multipliers)
+        self.toppings = tuple(toppings)
+
+        self.pizza_index = {name: i for i, name in enumerate(self.pizza_types)}
+        self.size_index = {name: i for i, name in enumerate(self.sizes)}
+        self.topping_index = {name: i for i, name in enumerate(self.toppings)}
+
+        self.base_cents = {
+            name: to_cents(details["base_price"])
+            for name, details in pizza_menu.items()
+        }
+        self.size_multipliers = dict(size_multipliers)
+        self.topping_cents = {name: to_cents(price) for name, price in toppings.items()}
+
+        # Price of one pizza for every (pizza_type, size) pair
+        self.pizza_cents_table = {
+            (pizza, size): int(round(base * multiplier))
+            for pizza, base in self.base_cents.items()
+            for size, multiplier in self.size_multipliers.items()
+        }
+
+        self._pizza_matrix = None
+        self._topping_vector = None
+
+    def pizza_cents(self, pizza_type: str, size: str) -> int:
+        """
+        Price of a single pizza without toppings, 0 if type or size is unknown
+        """
+        return self.pizza_cents_table.get((pizza_type, size), 0)
+
+    def toppings_cents(self, toppings: Iterable[str]) -> int:
+        """
+        Combined price of the given toppings, unknown toppings are free
+        """
+        topping_cents = self.topping_cents
+        return sum(topping_cents.get(topping, 0) for topping in toppings)
+
+    def quote(
+        self,
+        pizza_type: str,
+        size: str,
+        toppings: Iterable[str] = (),
+        quantity: int = 1,
+    ) -> PriceQuote:
+        """
+        Price a single order
+        """
+        pizza_cents = self.pizza_cents(pizza_type, size)
+        toppings_cents = self.toppings_cents(toppings)
+        subtotal = (pizza_cents + toppings_cents) * quantity
+        tax = tax_cents(subtotal)
+        return PriceQuote(
+            base_cents=self.base_cents.get(pizza_type, 0),
+            size_multiplier=self.size_multipliers.get(size, 1.0),
+            pizza_cents=pizza_cents,
+            toppings_cents=toppings_cents,
+            quantity=quantity,
+            subtotal_cents=subtotal,
+            tax_cents=tax,
+            total_cents=subtotal + tax,
+        )
+
+    def _tables(self):
+        # numpy is only needed for batch pricing, so import it on first use
+        import numpy as np
+
+        if self._pizza_matrix is None:
+            matrix = np.zeros((len(self.pizza_types), len(self.sizes)), np.int64)
+            for (pizza, size), cents in self.pizza_cents_table.items():
+                matrix[self.pizza_index[pizza], self.size_index[size]] = cents
+            self._pizza_matrix = matrix
+            self._topping_vector = np.array(
+                [self.topping_cents[t] for t in self.toppings], np.int64
+            )
+        return np, self._pizza_matrix, self._topping_vector
+
+    def price_arrays(self, pizza_idx, size_idx, topping_counts, quantities):
+        """
+        Vectorized pricing over pre-encoded orders.
+
+        pizza_idx and size_idx are index arrays into pizza_types and sizes
+        (-1 for unknown), topping_counts is an (n_orders, n_toppings) matrix
+        and quantities is an array of pizza counts. Returns an int64 array of
+        order totals in cents.
+        """
+        np, pizza_matrix, topping_vector = self._tables()
+
+        pizza_idx = np.asarray(pizza_idx)
+        size_idx = np.asarray(size_idx)
+
+        pizza_cents = pizza_matrix[pizza_idx, size_idx]
+        toppings_cents = np.asarray(topping_counts, np.int64) @ topping_vector
+        subtotal = (pizza_cents + toppings_cents) * np.asarray(quantities, np.int64)
+        # Orders without a pizza type or size are not priced yet
+        subtotal = np.where((pizza_idx >= 0) & (size_idx >= 0), subtotal, 0)
+        return subtotal + (subtotal * TAX_RATE_BPS + 5000) // 10000
+
+    def encode_orders(self, orders: Iterable["OrderState"]):
+        """
+        Encode OrderStates into the arrays expected by price_arrays
+        """
+        np, _, _ = self._tables()
+
+        pizza_index = self.pizza_index
+        size_index = self.size_index
+        topping_index = self.topping_index
+
+        pizza_idx = []
+        size_idx = []
+        quantities = []
+        topping_rows = []
+        topping_cols = []
+
+        for row, order in enumerate(orders):
+            pizza_idx.append(pizza_index.get(order.pizza_name, -1))
+            size_idx.append(size_index.get(order.size_name, -1))
+            quantities.append(order.quantity)
+            for topping in order.toppings:
+                col = topping_index.get(topping)
+                if col is not None:
+                    topping_rows.append(row)
+                    topping_cols.append(col)
+
+        topping_counts = np.zeros((len(pizza_idx), len(self.toppings)), np.int64)
+        np.add.at(topping_counts, (topping_rows, topping_cols), 1)
+
+        return (
+            np.array(pizza_idx, np.int64),
+            np.array(size_idx, np.int64),
+            topping_counts,
+            np.array(quantities, np.int64),
+        )
+
+    def encode_compact_orders(self, orders: Sequence[Sequence[Any]]):
+        """
+        Encode orders in their compact session form (see order_state) into
+        the arrays expected by price_arrays, without building OrderStates.
+
+        Pizza types, sizes and toppings are coded by their catalog position,
+        which is also their index here; codes this catalog doesn't have are
+        left unpriced.
+        """
+        np, _, _ = self._tables()
+
+        columns = np.array([order[2:6] for order in orders], object).reshape(-1, 4)
+        pizza_type, size, mask, quantity = columns.T
+        pizza_idx = np.where(np.equal(pizza_type, None), -1, pizza_type).astype(
+            np.int64
+        )
+        size_idx = np.where(np.equal(size, None), -1, size).astype(np.int64)
+        pizza_idx[pizza_idx >= len(self.pizza_types)] = -1
+        size_idx[size_idx >= len(self.sizes)] = -1
+
+        # Bit i of a toppings mask is the i-th topping
+        bits = np.arange(len(self.toppings), dtype=np.int64)
+        topping_counts = (mask.astype(np.int64)[:, None] >> bits) & 1
+
+        return pizza_idx, size_idx, topping_counts, quantity.astype(np.int64)
+
+    def price_orders(self, orders: Iterable["OrderState"]):
+        """
+        Price many orders in one vectorized pass.
+
+        Returns an int64 array of totals in cents, in input order.
+        """
+        return self.price_arrays(*self.encode_orders(orders))
+
+    def price_compact_orders(self, orders: Sequence[Sequence[Any]]):
+        """
+        Price many orders in their compact form in one vectorized pass.
+
+        Returns an int64 array of totals in cents, in input order.
+        """
+        return self.price_arrays(*self.encode_compact_orders(orders))
+
+
+@lru_cache(maxsize=2)
+def _cached_engine(catalog: Catalog) -> PricingEngine:
+    return PricingEngine(catalog.pizza_menu, catalog.size_multipliers, catalog.toppings)
+
+
+def get_pricing_engine(catalog: Optional[Catalog] = None) -> PricingEngine:
+    """
+    Return the pricing engine of a catalog snapshot, the current one by
+    default, compiling it once per catalog version
+    """
+    return _cached_engine(catalog or get_catalog())
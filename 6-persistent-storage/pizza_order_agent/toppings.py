@@ -0,0 +1,51 @@
+"""
+Compact topping storage for order state.
+
+Toppings are stored as a single integer bitmask where bit i is the i-th
+topping of the catalog. Membership, add and remove are single bit
+operations and the state delta for a topping change is one small int no
+matter how many toppings are on the pizza. Python ints are unbounded, so the
+catalog can grow to hundreds of toppings; new toppings must be appended to
+the end of the catalog so existing masks keep their meaning.
+"""
+
+from typing import Any, Iterable, Mapping, Optional
+
+from .catalog import Catalog, get_catalog
+
+TOPPINGS_MASK_KEY = "toppings_mask"
+
+
+def encode_toppings(toppings: Iterable[str], catalog: Optional[Catalog] = None) -> int:
+    """
+    Build a bitmask from topping names, ignoring unknown toppings
+    """
+    topping_bits = (catalog or get_catalog()).topping_bits
+    mask = 0
+    for topping in toppings:
+        mask |= topping_bits.get(topping, 0)
+    return mask
+
+
+def decode_toppings(mask: int, catalog: Optional[Catalog] = None) -> list[str]:
+    """
+    List the topping names set in a bitmask, in catalog order
+    """
+    topping_names = (catalog or get_catalog()).topping_names
+    toppings = []
+    while mask:
+        lowest_bit = mask & -mask
+        toppings.append(topping_names[lowest_bit.bit_length() - 1])
+        mask ^= lowest_bit
+    return toppings
+
+
+def get_toppings_mask(state: Mapping[str, Any]) -> int:
+    """
+    Read the toppings bitmask from order state
+    """
+    mask = state.get(TOPPINGS_MASK_KEY)
+    if mask is None:
+        # Sessions saved before the bitmask existed store a list of names
+        mask = encode_toppings(state.get("toppings") or [])
+    return mask
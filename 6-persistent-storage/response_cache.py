@@ -0,0 +1,241 @@
+"""
+Response cache for pizza turns that only read the order.
+
+Questions like "show me the menu" or "what's my order" are answered by the
+read-only display_menu / view_current_order tools, so as long as the session
+state is unchanged the answer is too. call_agent_cached keys each turn on the
+normalized user input plus a fingerprint of the session state and the menu
+version. A turn is only cached if every tool it called is read-only and it
+changed no state; repeats are then answered without calling the model. The
+exchange is still appended to the session, so the conversation history
+stays complete.
+
+The state a turn starts from is tracked by the cache: a session is read
+once, and after each turn the state changes in the events the runner
+yields are applied to the tracked copy, so a cache miss costs no extra
+session read. A hit reads the session anyway to record the exchange, and
+only answers from the cache if the stored state still matches, so a change
+made by another process is never answered from a stale entry.
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from google.adk.agents.invocation_context import new_invocation_context_id
+from google.adk.events import Event
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.state import State
+from google.genai import types
+
+from optimistic_state import VERSIONS_KEY
+from pizza_order_agent.catalog import get_catalog
+from utils import _process_event_response
+
+# Tools whose result depends only on the session state and the menu
+CACHEABLE_TOOLS = frozenset({"display_menu", "view_current_order"})
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def normalize_query(user_input: str) -> str:
+    """
+    Case, punctuation and spacing insensitive form of a user message
+    """
+    return _NON_WORD.sub(" ", user_input.lower()).strip()
+
+
+def state_fingerprint(state: dict[str, Any]) -> str:
+    catalog = get_catalog()
+    # Key versions are bookkeeping of the session service, not part of the
+    # order, and aren't in the events' state changes
+    state = {key: value for key, value in state.items() if key != VERSIONS_KEY}
+    payload = json.dumps(state, sort_keys=True, default=str)
+    return hashlib.sha1(
+        f"{catalog.version}:{catalog.digest}:{payload}".encode()
+    ).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of agent responses whose entries expire after ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()
+        # Last known state of each session, as of the end of its last turn
+        self._states: OrderedDict[Hashable, dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Hits turned into misses because the stored state had changed
+        self.stale = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, response: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def mark_stale(self):
+        """
+        Count the last hit as a miss: its session changed elsewhere
+        """
+        self.hits -= 1
+        self.misses += 1
+        self.stale += 1
+
+    def session_state(self, session_key: Hashable) -> Optional[dict[str, Any]]:
+        state = self._states.get(session_key)
+        if state is not None:
+            self._states.move_to_end(session_key)
+        return state
+
+    def track_state(self, session_key: Hashable, state: dict[str, Any]):
+        self._states[session_key] = state
+        self._states.move_to_end(session_key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._states.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale": self.stale,
+        }
+
+    def summary(self) -> str:
+        stats = self.snapshot()
+        return (
+            f"🗃️  Response cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries"
+        )
+
+
+def _is_cacheable(events: list[Event]) -> bool:
+    called_tools = False
+    for event in events:
+        if event.actions and event.actions.state_delta:
+            return False
+        for function_call in event.get_function_calls():
+            if function_call.name not in CACHEABLE_TOOLS:
+                return False
+            called_tools = True
+    return called_tools
+
+
+async def _record_cached_exchange(runner, session, content, response: str):
+    # Keep the conversation history the same as for an uncached turn
+    invocation_id = new_invocation_context_id()
+    await runner.session_service.append_event(
+        session=session,
+        event=Event(invocation_id=invocation_id, author="user", content=content),
+    )
+    await runner.session_service.append_event(
+        session=session,
+        event=Event(
+            invocation_id=invocation_id,
+            author=runner.agent.name,
+            content=types.Content(role="model", parts=[types.Part(text=response)]),
+        ),
+    )
+
+
+async def _get_session(runner, user_id: str, session_id: str):
+    # Only the state is needed, so don't load the whole event history
+    return await runner.session_service.get_session(
+        app_name=runner.app_name,
+        user_id=user_id,
+        session_id=session_id,
+        config=GetSessionConfig(num_recent_events=1),
+    )
+
+
+async def call_agent_cached(
+    user_input: str, runner, user_id: str, session_id: str, cache: ResponseCache
+) -> str:
+    """
+    call_agent_async that answers repeated read-only questions from the cache
+    """
+    session_key = (runner.app_name, user_id, session_id)
+    query = normalize_query(user_input)
+    content = types.Content(role="user", parts=[types.Part(text=user_input)])
+
+    session = None
+    state = cache.session_state(session_key)
+    if state is None:
+        session = await _get_session(runner, user_id, session_id)
+        # A missing session is left to the runner, which reports it
+        state = None if session is None else dict(session.state)
+
+    key = None if state is None else (runner.app_name, query, state_fingerprint(state))
+    response = None if key is None else cache.get(key)
+    if response is not None:
+        if session is None:
+            session = await _get_session(runner, user_id, session_id)
+        if session is not None:
+            fingerprint = state_fingerprint(session.state)
+            if fingerprint == key[2]:
+                await _record_cached_exchange(runner, session, content, response)
+                return response
+            # Changed since this process last saw it
+            cache.mark_stale()
+            state = dict(session.state)
+            key = (runner.app_name, query, fingerprint)
+
+    final_response_text = "Agent failed to process your request."  # Default
+    got_response = False
+    events = []
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=content,
+    ):
+        events.append(event)
+        response = await _process_event_response(event)
+        if response:
+            final_response_text = response
+            got_response = True
+
+    if key is not None:
+        for event in events:
+            if event.actions and event.actions.state_delta:
+                # As the session service applies them; temp: keys aren't kept
+                state.update(
+                    (k, v)
+                    for k, v in event.actions.state_delta.items()
+                    if not k.startswith(State.TEMP_PREFIX)
+                )
+        cache.track_state(session_key, state)
+        if got_response and _is_cacheable(events):
+            cache.put(key, final_response_text)
+    return final_response_text
@@ -0,0 +1,107 @@
+import asyncio
+
+from google.adk.runners import Runner
+
+from line_server import JsonLineServer
+from response_cache import call_agent_cached
+from utils import call_agent_async
+
+
+class SessionServer(JsonLineServer):
+    """
+    Serve many pizza order conversations concurrently from one process.
+
+    Requests are JSON objects with "user_id", "message" and optionally
+    "session_id" and "request_id". Turns for the same session run strictly in
+    arrival order, while turns for different sessions run concurrently up to
+    max_concurrency at a time. With serialize_sessions=False turns of the
+    same session run concurrently too, and the session service reconciles
+    their state writes.
+    """
+
+    def __init__(
+        self,
+        agent,
+        app_name: str,
+        session_service,
+        default_state: dict,
+        max_concurrency: int = 64,
+        response_cache=None,
+        serialize_sessions: bool = True,
+    ):
+        self.app_name = app_name
+        self.response_cache = response_cache
+        self.session_service = session_service
+        self.default_state = default_state
+        self.runner = Runner(
+            agent=agent,
+            app_name=app_name,
+            session_service=session_service,
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.serialize_sessions = serialize_sessions
+        # One lock per active session, dropped once nobody is waiting on it
+        self._session_locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._session_waiters: dict[tuple[str, str], int] = {}
+
+    async def _ensure_session(self, user_id: str, session_id: str | None) -> str:
+        if session_id:
+            return session_id
+        session = await self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            state=dict(self.default_state),
+        )
+        return session.id
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Run one conversation turn and return the JSON-serializable response
+        """
+        user_id = request["user_id"]
+        session_id = await self._ensure_session(user_id, request.get("session_id"))
+        if not self.serialize_sessions:
+            async with self._slots:
+                response = await self._run_turn(user_id, session_id, request["message"])
+            return self._response(request, user_id, session_id, response)
+
+        key = (user_id, session_id)
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        self._session_waiters[key] = self._session_waiters.get(key, 0) + 1
+        try:
+            # Take the session lock before a slot so queued turns of a busy
+            # session don't hold concurrency slots other sessions could use
+            async with lock, self._slots:
+                response = await self._run_turn(user_id, session_id, request["message"])
+        finally:
+            self._session_waiters[key] -= 1
+            if not self._session_waiters[key]:
+                del self._session_waiters[key]
+                del self._session_locks[key]
+
+        return self._response(request, user_id, session_id, response)
+
+    async def _run_turn(self, user_id: str, session_id: str, message: str) -> str:
+        if self.response_cache is not None:
+            return await call_agent_cached(
+                user_input=message,
+                runner=self.runner,
+                user_id=user_id,
+                session_id=session_id,
+                cache=self.response_cache,
+            )
+        return await call_agent_async(
+            user_input=message,
+            runner=self.runner,
+            user_id=user_id,
+            session_id=session_id,
+        )
+
+    @staticmethod
+    def _response(request: dict, user_id: str, session_id: str, response: str) -> dict:
+        return {
+            "request_id": request.get("request_id"),
+            "user_id": user_id,
+            "session_id": session_id,
+            "response": response,
+        }
@@ -0,0 +1,166 @@
+"""
+Compaction of long-lived sessions in the session database.
+
+DatabaseSessionService already stores every session's current state as a
+snapshot in the sessions table; the events table only adds the history
+behind it. Loading a session reads all of its events, though, so customers
+who keep coming back make every resume slower and the database bigger.
+
+Compaction keeps the state snapshot as it is and trims each oversized
+session's history down to a tail of recent events. The tail always starts
+at a user message, so no tool call is separated from its response. The
+agent sees exactly the same state afterwards, plus the recent conversation.
+
+Run from 6-persistent-storage, once or every N seconds:
+
+    python session_compaction.py --keep-events 50 --max-events 200 --vacuum
+    python session_compaction.py --every 3600
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Optional
+
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import StorageEvent
+from sqlalchemy import delete, func, select
+
+from main import DB_URL
+from session_indexes import SESSION_EVENTS_INDEX, session_events
+
+
+def _tail_start(db, app_name: str, user_id: str, session_id: str, keep_events: int):
+    """
+    Timestamp of the first event to keep, or None if nothing can be dropped
+    """
+    in_session = session_events(app_name, user_id, session_id)
+    oldest_kept = db.scalar(
+        select(StorageEvent.timestamp)
+        .where(in_session)
+        .order_by(StorageEvent.timestamp.desc())
+        .offset(keep_events - 1)
+        .limit(1)
+    )
+    if oldest_kept is None:
+        return None
+    # Extend the tail back to the start of that turn
+    return db.scalar(
+        select(func.max(StorageEvent.timestamp)).where(
+            in_session,
+            StorageEvent.author == "user",
+            StorageEvent.timestamp <= oldest_kept,
+        )
+    )
+
+
+def compact_sessions(
+    session_service: DatabaseSessionService,
+    app_name: Optional[str] = None,
+    keep_events: int = 50,
+    max_events: int = 200,
+) -> dict[str, int]:
+    """
+    Trim every session with more than max_events events to about keep_events.
+
+    Sessions between the two limits are left alone, so a session is only
+    rewritten once every (max_events - keep_events) events.
+    """
+    if keep_events < 1 or max_events < keep_events:
+        raise ValueError("Need 1 <= keep_events <= max_events")
+
+    SESSION_EVENTS_INDEX.create(session_service.db_engine, checkfirst=True)
+
+    oversized = (
+        select(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id)
+        .group_by(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id)
+        .having(func.count() > max_events)
+    )
+    if app_name is not None:
+        oversized = oversized.where(StorageEvent.app_name == app_name)
+
+    stats = {"sessions": 0, "events_deleted": 0}
+    with session_service.database_session_factory() as db:
+        for row in db.execute(oversized).all():
+            start: Optional[datetime] = _tail_start(db, *row, keep_events)
+            if start is None:
+                continue
+            # One transaction per session keeps lock hold times short
+            deleted = db.execute(
+                delete(StorageEvent).where(
+                    session_events(*row), StorageEvent.timestamp < start
+                )
+            ).rowcount
+            db.commit()
+            if deleted:
+                stats["sessions"] += 1
+                stats["events_deleted"] += deleted
+    return stats
+
+
+def vacuum(session_service: DatabaseSessionService):
+    """
+    Give the space freed by compaction back to the filesystem (SQLite only)
+    """
+    engine = session_service.db_engine
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compact long session histories")
+    parser.add_argument("--db-url", default=DB_URL)
+    parser.add_argument("--app-name", help="Only compact this app's sessions")
+    parser.add_argument(
+        "--keep-events",
+        type=int,
+        default=50,
+        help="Recent events to keep per compacted session",
+    )
+    parser.add_argument(
+        "--max-events",
+        type=int,
+        default=200,
+        help="Only compact sessions with more events than this",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Shrink the SQLite file after compacting",
+    )
+    parser.add_argument(
+        "--every",
+        type=float,
+        help="Keep running and compact every this many seconds",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    session_service = DatabaseSessionService(db_url=args.db_url)
+
+    while True:
+        start = time.perf_counter()
+        stats = compact_sessions(
+            session_service,
+            app_name=args.app_name,
+            keep_events=args.keep_events,
+            max_events=args.max_events,
+        )
+        if args.vacuum and stats["events_deleted"]:
+            vacuum(session_service)
+        print(
+            f"🗜️  Compacted {stats['sessions']} sessions, dropped "
+            f"{stats['events_deleted']} events in {time.perf_counter() - start:.2f}s"
+        )
+
+        if args.every is None:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
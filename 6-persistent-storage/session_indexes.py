@@ -0,0 +1,35 @@
+"""
+Extra indexes on ADK's session tables, and the event filter that uses them,
+shared by the session services and the maintenance scripts.
+"""
+
+from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+from sqlalchemy import Index
+
+# Covers "latest session for this user" so resuming is one index seek
+LATEST_SESSION_INDEX = Index(
+    "ix_sessions_app_user_update_time",
+    StorageSession.app_name,
+    StorageSession.user_id,
+    StorageSession.update_time,
+)
+
+# Covers loading, counting and trimming one session's events in time order
+SESSION_EVENTS_INDEX = Index(
+    "ix_events_app_user_session_timestamp",
+    StorageEvent.app_name,
+    StorageEvent.user_id,
+    StorageEvent.session_id,
+    StorageEvent.timestamp,
+)
+
+
+def session_events(app_name: str, user_id: str, session_id: str):
+    """
+    WHERE clause for one session's events, a prefix of SESSION_EVENTS_INDEX
+    """
+    return (
+        (StorageEvent.app_name == app_name)
+        & (StorageEvent.user_id == user_id)
+        & (StorageEvent.session_id == session_id)
+    )
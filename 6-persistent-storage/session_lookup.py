@@ -0,0 +1,67 @@
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.database_session_service import StorageSession
+from sqlalchemy import select
+
+from session_indexes import LATEST_SESSION_INDEX
+
+_indexed_engines = set()
+
+
+def _ensure_latest_session_index(session_service: DatabaseSessionService):
+    engine = session_service.db_engine
+    if engine.url in _indexed_engines:
+        return
+    LATEST_SESSION_INDEX.create(engine, checkfirst=True)
+    _indexed_engines.add(engine.url)
+
+
+def _latest_session_query(app_name: str, user_id: str):
+    return (
+        select(StorageSession.id, StorageSession.state)
+        .where(StorageSession.app_name == app_name)
+        .where(StorageSession.user_id == user_id)
+        .order_by(StorageSession.update_time.desc())
+        .limit(1)
+    )
+
+
+async def find_latest_session(
+    session_service, app_name: str, user_id: str
+) -> tuple[str, dict] | None:
+    """
+    Find the user's most recently updated session.
+
+    Returns (session_id, session_state) without loading the session's events,
+    or None if the user has no sessions yet.
+    """
+    from async_session_service import AsyncSqliteSessionService
+
+    if isinstance(session_service, AsyncSqliteSessionService):
+        # Its constructor already created the index
+        async with session_service.database_session_factory() as db:
+            row = (await db.execute(_latest_session_query(app_name, user_id))).first()
+        if row is None:
+            return None
+        return row.id, row.state or {}
+
+    if isinstance(session_service, DatabaseSessionService):
+        _ensure_latest_session_index(session_service)
+        with session_service.database_session_factory() as db:
+            row = db.execute(_latest_session_query(app_name, user_id)).first()
+        if row is None:
+            return None
+        return row.id, row.state or {}
+
+    # Other session services have no index to use, fall back to listing
+    response = await session_service.list_sessions(app_name=app_name, user_id=user_id)
+    if not response.sessions:
+        return None
+    latest = max(response.sessions, key=lambda s: s.last_update_time)
+    session = await session_service.get_session(
+        app_name=app_name,
+        user_id=user_id,
+        session_id=latest.id,
+        config=GetSessionConfig(num_recent_events=1),
+    )
+    return latest.id, session.state if session else {}
@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import json
+import sys
+import zlib
+
+from line_server import JsonLineServer
+
+# Worker responses can carry long agent replies, so allow lines well above
+# asyncio's 64 KiB default
+WORKER_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def shard_for(user_id: str, num_shards: int) -> int:
+    """
+    Stable shard index for a user, the same in every process and run
+    """
+    return zlib.crc32(user_id.encode()) % num_shards
+
+
+class _Worker:
+    """
+    One `main.py --serve stdio` child process and its in-flight requests.
+    """
+
+    def __init__(self, index: int, command: list[str]):
+        self.index = index
+        self.command = command
+        self.process: asyncio.subprocess.Process | None = None
+        self.reader_task: asyncio.Task | None = None
+        self.start_lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
+        self.pending: dict[str, asyncio.Future] = {}
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def ensure_started(self):
+        async with self.start_lock:
+            if self.running:
+                return
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                limit=WORKER_LINE_LIMIT,
+            )
+            # Requests in flight on a previous process are failed by its own
+            # reader, never by this one
+            self.pending = {}
+            self.reader_task = asyncio.create_task(
+                self._read_responses(self.process, self.pending)
+            )
+
+    async def _read_responses(
+        self, process: asyncio.subprocess.Process, pending: dict[str, asyncio.Future]
+    ):
+        error = None
+        try:
+            while line := await process.stdout.readline():
+                try:
+                    response = json.loads(line)
+                except json.JSONDecodeError:
+                    response = None
+                if not isinstance(response, dict):
+                    # Stray output (a print, a library warning) is not a reply
+                    print(
+                        f"⚠️ Worker {self.index} wrote a non-JSON line: "
+                        f"{line[:200].decode(errors='replace').rstrip()}",
+                        file=sys.stderr,
+                    )
+                    continue
+                future = pending.pop(response.get("request_id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+            await process.wait()
+        except Exception as e:
+            # Without a reader the worker can't be used; kill it so the next
+            # request starts a new one
+            error = RuntimeError(f"Worker {self.index} reader failed: {e}")
+            if process.returncode is None:
+                process.kill()
+            raise
+        finally:
+            # Whatever is still pending will never be answered
+            if error is None:
+                error = RuntimeError(
+                    f"Worker {self.index} exited with code {process.returncode}"
+                )
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            pending.clear()
+
+    async def send(self, request_id: str, request: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        pending = self.pending
+        pending[request_id] = future
+        try:
+            async with self.write_lock:
+                self.process.stdin.write((json.dumps(request) + "\n").encode())
+                await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pending.pop(request_id, None)
+            raise RuntimeError(f"Worker {self.index} is not accepting requests")
+        return await future
+
+    async def stop(self):
+        if not self.running:
+            return
+        # Workers finish their in-flight turns and flush on stdin EOF
+        self.process.stdin.close()
+        await self.reader_task
+
+
+class ShardedServer(JsonLineServer):
+    """
+    Front dispatcher that spreads pizza order sessions over worker processes.
+
+    Each worker is a separate Python process with its own Runner and session
+    service connection, so tool work and event handling use every core
+    instead of one event loop. Requests are routed by a hash of user_id: the
+    session id of a new conversation is only known once a worker has created
+    it, but the user id always is, so all turns of a session land on the same
+    worker, which keeps them in order. The dispatcher itself never imports
+    ADK; it only forwards JSON lines.
+
+    A worker that exits is restarted on its next request; requests that were
+    in flight on it fail with an error response.
+    """
+
+    def __init__(self, worker_commands: list[list[str]]):
+        self.workers = [
+            _Worker(index, command) for index, command in enumerate(worker_commands)
+        ]
+        self._request_ids = itertools.count()
+
+    async def _worker_for(self, user_id: str) -> _Worker:
+        worker = self.workers[shard_for(user_id, len(self.workers))]
+        await worker.ensure_started()
+        return worker
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Forward one request to the worker that owns its user
+        """
+        worker = await self._worker_for(request["user_id"])
+        # Client request ids need not be unique across connections, so tag
+        # the forwarded request with our own and restore the client's after
+        request_id = str(next(self._request_ids))
+        response = await worker.send(request_id, {**request, "request_id": request_id})
+        return {**response, "request_id": request.get("request_id")}
+
+    async def start(self):
+        """
+        Start every worker up front instead of on its first request
+        """
+        await asyncio.gather(*(worker.ensure_started() for worker in self.workers))
+        print(f"🍕 Started {len(self.workers)} worker processes", file=sys.stderr)
+
+    async def stop(self):
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
@@ -1,5 +1,16 @@
+from collections.abc import AsyncIterator
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 
+from pizza_order_agent.pricing import get_pricing_engine, to_dollars
+from pizza_order_agent.order_state import (
+    COMPACT_FORMAT,
+    ORDER_KEY,
+    Status,
+    load_order,
+)
+
 
 async def _process_event_response(event) -> str | None:
     agent_response = None
@@ -41,6 +52,83 @@ async def call_agent_async(
     return final_response_text
 
 
+def _process_event_chunks(event, streamed_text: bool) -> list[dict]:
+    """
+    Split an event into the progressive chunks yielded by stream_agent_async
+    """
+    chunks = []
+
+    if event.partial:
+        if event.content and event.content.parts:
+            for part in event.content.parts:
+                if part.text:
+                    chunks.append({"type": "text", "text": part.text})
+        return chunks
+
+    text = ""
+    if event.content and event.content.parts:
+        text = "".join(part.text or "" for part in event.content.parts)
+    # Without streamed deltas (e.g. a non-streaming model) this text has not
+    # been shown yet, so emit it as a single chunk
+    if text and not streamed_text:
+        chunks.append({"type": "text", "text": text})
+
+    for function_call in event.get_function_calls():
+        chunks.append(
+            {
+                "type": "tool_call",
+                "name": function_call.name,
+                "args": dict(function_call.args or {}),
+            }
+        )
+    for function_response in event.get_function_responses():
+        chunks.append(
+            {
+                "type": "tool_result",
+                "name": function_response.name,
+                "response": function_response.response,
+            }
+        )
+
+    if event.is_final_response():
+        if not text and event.actions and event.actions.escalate:
+            text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+            chunks.append({"type": "text", "text": text})
+        chunks.append({"type": "final", "text": text.strip()})
+
+    return chunks
+
+
+async def stream_agent_async(
+    user_input: str, runner, user_id: str, session_id: str
+) -> AsyncIterator[dict]:
+    """
+    Run one turn and yield partial text and tool events as they happen.
+
+    Yields dicts with a "type" of "text" (a new piece of response text),
+    "tool_call", "tool_result" or "final" (the complete response text).
+    """
+    content = types.Content(
+        role="user",
+        parts=[types.Part(text=user_input)],
+    )
+
+    streamed_text = False
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=content,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        for chunk in _process_event_chunks(event, streamed_text):
+            if chunk["type"] == "text":
+                streamed_text = True
+            elif chunk["type"] in ("final", "tool_call"):
+                # The next model response streams its text from scratch
+                streamed_text = False
+            yield chunk
+
+
 def format_order_state_for_display(order_state: dict[str, any]) -> str:
     """
     Format the current order state for display to the user
@@ -48,68 +136,66 @@ def format_order_state_for_display(order_state: dict[str, any]) -> str:
     if not order_state:
         return "Your order is empty."
 
+    order = load_order(order_state)
     output = "\n🛒 **CURRENT ORDER:**\n"
 
     # Pizza details
-    pizza_type = order_state.get("pizza_type")
+    pizza_type = order.pizza_name
     if pizza_type:
         output += f"Pizza: {pizza_type.replace('_', ' ').title()}\n"
     else:
         output += "Pizza: Not selected\n"
 
     # Size
-    size = order_state.get("size")
+    size = order.size_name
     if size:
         output += f"Size: {size.replace('_', ' ').title()}\n"
     else:
         output += "Size: Not selected\n"
 
     # Toppings
-    toppings = order_state.get("toppings", [])
+    toppings = order.toppings
     if toppings:
         toppings_str = ", ".join([t.replace("_", " ").title() for t in toppings])
         output += f"Extra Toppings: {toppings_str}\n"
 
     # Quantity
-    quantity = order_state.get("quantity", 1)
-    output += f"Quantity: {quantity}\n"
+    output += f"Quantity: {order.quantity}\n"
 
     # Delivery info
-    address = order_state.get("address")
-    if address:
-        output += f"Delivery Address: {address}\n"
+    if order.address:
+        output += f"Delivery Address: {order.address}\n"
 
-    phone = order_state.get("phone_number")
-    if phone:
-        output += f"Phone: {phone}\n"
+    if order.phone_number:
+        output += f"Phone: {order.phone_number}\n"
 
     # Price
-    total_price = order_state.get("total_price", 0.0)
+    total_price = order.total_price
     if total_price > 0:
         output += f"\n**Total: ${total_price:.2f}**\n"
 
     return output
 
 
+STATUS_MESSAGES = {
+    Status.START: "👋 Welcome! Ready to order some delicious pizza?",
+    Status.PIZZA_SELECTED: "🍕 Great choice! Now let's pick a size.",
+    Status.SIZE_SELECTED: "📏 Perfect! Want to add any extra toppings?",
+    Status.TOPPINGS_ADDED: "🧀 Awesome toppings! Ready for delivery details?",
+    Status.DELIVERY_INFO_SET: "📍 All set! Let me calculate your total.",
+    Status.ORDER_COMPLETE: "✅ Order ready! Confirm to place your order.",
+}
+
+
 def get_order_status_message(order_state: dict[str, any]) -> str:
     """
     Get a status message based on the current order state
     """
     if not order_state:
-        return "👋 Welcome! Ready to order some delicious pizza?"
+        return STATUS_MESSAGES[Status.START]
 
-    status = order_state.get("status", "START")
-
-    status_messages = {
-        "START": "👋 Welcome! Ready to order some delicious pizza?",
-        "PIZZA_SELECTED": "🍕 Great choice! Now let's pick a size.",
-        "SIZE_SELECTED": "📏 Perfect! Want to add any extra toppings?",
-        "TOPPINGS_ADDED": "🧀 Awesome toppings! Ready for delivery details?",
-        "DELIVERY_INFO_SET": "📍 All set! Let me calculate your total.",
-        "ORDER_COMPLETE": "✅ Order ready! Confirm to place your order.",
-    }
-
-    return status_messages.get(status, "Let me help you with your pizza order!")
+    status = load_order(order_state).status
+    return STATUS_MESSAGES.get(status, "Let me help you with your pizza order!")
 
 
 def is_order_complete(order_state: dict[str, any]) -> bool:
@@ -119,12 +205,7 @@ def is_order_complete(order_state: dict[str, any]) -> bool:
     if not order_state:
         return False
 
-    return (
-        bool(order_state.get("pizza_type"))
-        and bool(order_state.get("size"))
-        and bool(order_state.get("address"))
-        and bool(order_state.get("phone_number"))
-    )
+    return load_order(order_state).is_complete
 
 
 def get_order_progress(order_state: dict[str, any]) -> str:
@@ -134,34 +215,35 @@ def get_order_progress(order_state: dict[str, any]) -> str:
     if not order_state:
         return "⭕ ⭕ ⭕ ⭕ ⭕"
 
+    order = load_order(order_state)
     progress = ""
 
     # Pizza type selected
-    if order_state.get("pizza_type"):
+    if order.pizza_type is not None:
         progress += "✅ "
     else:
         progress += "⭕ "
 
     # Size selected
-    if order_state.get("size"):
+    if order.size is not None:
         progress += "✅ "
     else:
         progress += "⭕ "
 
     # Toppings (optional but show if any)
-    if order_state.get("toppings"):
+    if order.toppings_mask:
         progress += "✅ "
     else:
         progress += "➖ "
 
     # Address provided
-    if order_state.get("address"):
+    if order.address:
         progress += "✅ "
     else:
         progress += "⭕ "
 
     # Phone provided
-    if order_state.get("phone_number"):
+    if order.phone_number:
         progress += "✅"
     else:
         progress += "⭕"
@@ -173,53 +255,30 @@ def calculate_order_price(order_state: dict[str, any]) -> float:
     """
     Calculate the total price based on current order state
     """
-    if (
-        not order_state
-        or not order_state.get("pizza_type")
-        or not order_state.get("size")
-    ):
+    order = load_order(order_state)
+    if order.pizza_type is None or order.size is None:
         return 0.0
 
-    # Pizza menu (simplified version for calculation)
-    pizza_prices = {
-        "margherita": 12.99,
-        "pepperoni": 14.99,
-        "supreme": 18.99,
-        "hawaiian": 16.99,
-        "meat_lovers": 19.99,
-        "veggie": 15.99,
-    }
-
-    size_multipliers = {"small": 0.8, "medium": 1.0, "large": 1.3, "extra_large": 1.6}
-
-    topping_prices = {
-        "pepperoni": 2.00,
-        "sausage": 2.00,
-        "mushrooms": 1.50,
-        "peppers": 1.50,
-        "onions": 1.50,
-        "olives": 1.50,
-        "extra_cheese": 2.50,
-        "bacon": 2.50,
-        "ham": 2.00,
-        "pineapple": 1.50,
-    }
-
-    # Base calculation
-    base_price = pizza_prices.get(order_state["pizza_type"], 0)
-    size_multiplier = size_multipliers.get(order_state["size"], 1.0)
-    pizza_price = base_price * size_multiplier
+    quote = get_pricing_engine().quote(
+        order.pizza_name, order.size_name, order.toppings, order.quantity
+    )
+    return to_dollars(quote.total_cents)
 
-    # Toppings
-    toppings = order_state.get("toppings", [])
-    toppings_price = sum(topping_prices.get(topping, 0) for topping in toppings)
 
-    # Quantity
-    quantity = order_state.get("quantity", 1)
+def _compact_order(order_state: dict[str, any]) -> list:
+    compact = order_state.get(ORDER_KEY) if order_state else None
+    if compact is None or compact[0] != COMPACT_FORMAT:
+        # Sessions in the old layout are converted; load_order rejects
+        # formats it doesn't know
+        compact = load_order(order_state).to_compact()
+    return compact
 
-    # Calculate total
-    subtotal = (pizza_price + toppings_price) * quantity
-    tax = subtotal * 0.08  # 8% tax
-    total = subtotal + tax
 
-    return round(total, 2)
+def calculate_order_prices(order_states: list[dict[str, any]]) -> list[float]:
+    """
+    Calculate the total price of many orders in a single vectorized pass,
+    reading the stored compact orders directly
+    """
+    orders = [_compact_order(order_state) for order_state in order_states]
+    totals = get_pricing_engine().price_compact_orders(orders)
+    return (totals / 100).tolist()